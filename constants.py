@@ -2,3 +2,13 @@
 
 # Mac Address used by LLDP to multicast messages
 LLDP_MULTICAST_MAC = '01:80:c2:00:00:0e'
+
+# LLDP TLV types and subtype used on the packets this NApp sends
+LLDP_TLV_END = 0
+LLDP_TLV_CHASSIS_ID = 1
+LLDP_TLV_PORT_ID = 2
+LLDP_TLV_TTL = 3
+LLDP_SUBTYPE_LOCAL = 7
+
+# LLDP time to live in seconds
+LLDP_TTL = 120
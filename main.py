@@ -1,16 +1,22 @@
 """NApp responsible to discover new switches and hosts."""
+import asyncio
+import logging
+import os
 import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from weakref import WeakKeyDictionary
 
 import httpx
 import tenacity
 from napps.kytos.of_core.msg_prios import of_msg_prio
 from napps.kytos.of_lldp import constants, settings
 from napps.kytos.of_lldp.managers import LivenessManager, LoopManager
-from napps.kytos.of_lldp.managers.loop_manager import LoopState
-from napps.kytos.of_lldp.utils import (get_cookie, try_to_gen_intf_mac,
+from napps.kytos.of_lldp.managers.loop_manager import LOOP_STATE_STOPPED
+from napps.kytos.of_lldp.utils import (get_cookie, int_dpid, mac_to_bytes,
+                                       put_many, try_to_gen_intf_mac,
                                        update_flow)
-from pyof.foundation.basic_types import DPID, UBInt32
-from pyof.foundation.network_types import LLDP, VLAN, Ethernet, EtherType
+from pyof.foundation.network_types import Ethernet, EtherType
 from pyof.v0x04.common.action import ActionOutput as AO13
 from pyof.v0x04.common.port import PortNo as Port13
 from pyof.v0x04.controller2switch.packet_out import PacketOut as PO13
@@ -28,6 +34,22 @@ from kytos.core.switch import Switch
 
 from .controllers import LivenessController
 
+# TLV header (7 bits type, 9 bits length) followed by the TLV subtype
+LLDP_TLV_HEADER = struct.Struct("!HB")
+
+# Ethernet frames sent by of_lldp, with or without an 802.1Q tag, carrying
+# the chassis id, port id, TTL and end of LLDPDU TLVs
+LLDP_FRAME = struct.Struct("!6s6sH" "HBQHBIHHH")
+LLDP_VLAN_FRAME = struct.Struct("!6s6sHHH" "HBQHBIHHH")
+LLDP_FRAME_MAX_SIZE = 2048
+LLDP_MULTICAST_MAC_BYTES = mac_to_bytes(constants.LLDP_MULTICAST_MAC)
+
+LLDP_PACKET_OUT_LOG_MSG = (
+    "Switch: %s (%s) Interface: %s -- LLDP PacketOut --"
+    " Ethernet: eth_type (%s) | src (%s) | dst (%s) /"
+    " LLDP: Switch (%s) | portno (%s)"
+)
+
 
 class Main(KytosNApp):
     """Main OF_LLDP NApp Class."""
@@ -48,6 +70,26 @@ class Main(KytosNApp):
         Link.register_status_func(f"{self.napp_id}_liveness",
                                   LivenessManager.link_status_hook_liveness)
         self.table_group = {"base": 0}
+        self._tick_local = threading.local()
+        self._per_switch = WeakKeyDictionary()
+        # Unknown until execute() walks all switches, which usually haven't
+        # been loaded yet at this point
+        self._active_lldp_count = None
+        self._lldp_count_generation = 0
+        # Invalidations come from the event loop, REST and listen_to
+        # threads, so they are serialized with the count store in execute()
+        self._lldp_count_lock = threading.Lock()
+        self._tick_pool = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) * 2),
+            thread_name_prefix="of_lldp_execute",
+        )
+        # Keep-alive connections to flow_manager, enough for every switch
+        # to push its flows in parallel on mass switch enabled events
+        pool_size = max(32, len(self.controller.switches))
+        self._http = httpx.Client(limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        ))
 
     @staticmethod
     def get_liveness_controller() -> LivenessController:
@@ -56,82 +98,127 @@ class Main(KytosNApp):
 
     def execute(self):
         """Send LLDP Packets every 'POLLING_TIME' seconds to all switches."""
-        switches = list(self.controller.switches.values())
-        for switch in switches:
-            try:
-                of_version = switch.connection.protocol.version
-            except AttributeError:
-                of_version = None
+        generation = self._lldp_count_generation
+        if self._active_lldp_count != 0:
+            switches = list(self.controller.switches.values())
+            count = sum(self._tick_pool.map(self._emit_switch, switches))
+            # Only trust the count if LLDP interfaces haven't changed since
+            with self._lldp_count_lock:
+                if generation == self._lldp_count_generation:
+                    self._active_lldp_count = count
+
+        self.try_to_publish_stopped_loops()
+        self.liveness_manager.reaper(self.dead_interval)
+
+    def _emit_switch(self, switch) -> int:
+        """Send LLDP Packets to the LLDP enabled interfaces of a switch.
+
+        Returns:
+            The number of interfaces marked to receive LLDP packets.
+
+        """
+        # Interface marked to receive lldp packet
+        interfaces = [interface for interface in switch.interfaces.values()
+                      if interface.lldp]
+        try:
+            of_version = switch.connection.protocol.version
+        except AttributeError:
+            of_version = None
+
+        if not switch.is_connected():
+            return len(interfaces)
+
+        if of_version == 0x04:
+            local_port = Port13.OFPP_LOCAL
+        else:
+            # skip the current switch with unsupported OF version
+            return len(interfaces)
 
-            if not switch.is_connected():
+        scratch = self._get_scratch()
+        log_debug = log.isEnabledFor(logging.DEBUG)
+        events_out = []
+
+        for interface in interfaces:
+            # Only send LLDP packet to active interface
+            if not interface.is_active() or not interface.is_enabled():
+                continue
+            # Avoid the interface that connects to the controller.
+            if interface.port_number == local_port:
                 continue
 
-            if of_version == 0x04:
-                port_type = UBInt32
-                local_port = Port13.OFPP_LOCAL
-            else:
-                # skip the current switch with unsupported OF version
+            src_addr = try_to_gen_intf_mac(interface.address, switch.id,
+                                           interface.port_number)
+            frame = self._get_lldp_frame(switch, interface.port_number,
+                                         src_addr, scratch)
+
+            packet_out = self._build_lldp_packet_out(
+                                of_version,
+                                interface.port_number, frame)
+
+            if packet_out is None:
                 continue
 
-            interfaces = list(switch.interfaces.values())
-            for interface in interfaces:
-                # Interface marked to receive lldp packet
-                # Only send LLDP packet to active interface
-                if (not interface.lldp or not interface.is_active()
-                   or not interface.is_enabled()):
-                    continue
-                # Avoid the interface that connects to the controller.
-                if interface.port_number == local_port:
-                    continue
-
-                lldp = LLDP()
-                lldp.chassis_id.sub_value = DPID(switch.dpid)
-                lldp.port_id.sub_value = port_type(interface.port_number)
-
-                src_addr = try_to_gen_intf_mac(interface.address, switch.id,
-                                               interface.port_number)
-                ethernet = Ethernet()
-                ethernet.ether_type = EtherType.LLDP
-                ethernet.source = src_addr
-                ethernet.destination = constants.LLDP_MULTICAST_MAC
-                ethernet.data = lldp.pack()
-                # self.vlan_id == None will result in a packet with no VLAN.
-                ethernet.vlans.append(VLAN(vid=self.vlan_id))
-
-                packet_out = self._build_lldp_packet_out(
-                                    of_version,
-                                    interface.port_number, ethernet.pack())
-
-                if packet_out is None:
-                    continue
-
-                event_out = KytosEvent(
-                    name='kytos/of_lldp.messages.out.ofpt_packet_out',
-                    priority=of_msg_prio(packet_out.header.message_type.value),
-                    content={
-                            'destination': switch.connection,
-                            'message': packet_out})
-
-                self.controller.buffers.msg_out.put(event_out)
-                log.debug(
-                    "Sending a LLDP PacketOut to the switch %s",
-                    switch.dpid)
-
-                msg = 'Switch: %s (%s)'
-                msg += ' Interface: %s'
-                msg += ' -- LLDP PacketOut --'
-                msg += ' Ethernet: eth_type (%s) | src (%s) | dst (%s) /'
-                msg += ' LLDP: Switch (%s) | portno (%s)'
-
-                log.debug(
-                    msg,
-                    switch.connection, switch.dpid,
-                    interface.id, ethernet.ether_type,
-                    ethernet.source, ethernet.destination,
-                    switch.dpid, interface.port_number)
+            event_out = KytosEvent(
+                name='kytos/of_lldp.messages.out.ofpt_packet_out',
+                priority=of_msg_prio(packet_out.header.message_type.value),
+                content={
+                        'destination': switch.connection,
+                        'message': packet_out})
 
-        self.try_to_publish_stopped_loops()
-        self.liveness_manager.reaper(self.dead_interval)
+            events_out.append(event_out)
+            if not log_debug:
+                continue
+            log.debug(
+                "Sending a LLDP PacketOut to the switch %s",
+                switch.dpid)
+            log.debug(
+                LLDP_PACKET_OUT_LOG_MSG,
+                switch.connection, switch.dpid,
+                interface.id, EtherType.LLDP,
+                src_addr, constants.LLDP_MULTICAST_MAC,
+                switch.dpid, interface.port_number)
+
+        if events_out:
+            put_many(self.controller.buffers.msg_out, events_out)
+        return len(interfaces)
+
+    def _invalidate_lldp_count(self) -> None:
+        """Invalidate the count of interfaces marked to receive LLDP.
+
+        The next execute() will walk all switches again to recount them.
+        """
+        with self._lldp_count_lock:
+            self._lldp_count_generation += 1
+            self._active_lldp_count = None
+
+    def _get_lldp_frame(self, switch, port_number, source, scratch):
+        """Get the LLDP frame of a switch port, packing it if needed.
+
+        Frames are cached per switch and only packed again if the source
+        MAC address changes or the switch cache is invalidated.
+        """
+        frames = self._per_switch.get(switch)
+        if frames is None:
+            frames = self._per_switch[switch] = {}
+        cached = frames.get(port_number)
+        if cached and cached[0] == source:
+            return cached[1]
+
+        frame_len = self._pack_lldp_frame(scratch, source, switch.dpid,
+                                          port_number)
+        # The frame is copied out of the scratch buffer since the
+        # PacketOut is only packed later on by msg_out consumers.
+        frame = bytes(memoryview(scratch)[:frame_len])
+        frames[port_number] = (source, frame)
+        return frame
+
+    def _get_scratch(self) -> bytearray:
+        """Get the LLDP frame scratch buffer of the current thread."""
+        scratch = getattr(self._tick_local, "scratch", None)
+        if scratch is None:
+            scratch = bytearray(LLDP_FRAME_MAX_SIZE)
+            self._tick_local.scratch = scratch
+        return scratch
 
     def load_liveness(self) -> None:
         """Load liveness."""
@@ -149,7 +236,7 @@ class Main(KytosNApp):
                     interface_a = switch.interfaces[port_pair[0]]
                     interface_b = switch.interfaces[port_pair[1]]
                     self.loop_manager.publish_loop_state(
-                        interface_a, interface_b, LoopState.stopped.value
+                        interface_a, interface_b, LOOP_STATE_STOPPED
                     )
             except (KeyError, AttributeError) as exc:
                 log.error("try_to_publish_stopped_loops failed with switch:"
@@ -205,6 +292,12 @@ class Main(KytosNApp):
         topology = event.content["topology"]
         await self.loop_manager.handle_topology_loaded(topology)
         self.load_liveness()
+        self._invalidate_lldp_count()
+
+    @alisten_to(".*.switch.interface.created")
+    async def on_interface_created(self, _event):
+        """Handle on interface created."""
+        self._invalidate_lldp_count()
 
     @alisten_to("kytos/topology.switches.metadata.(added|removed)")
     async def on_switches_metadata_changed(self, event):
@@ -226,6 +319,11 @@ class Main(KytosNApp):
         except AttributeError:
             of_version = None
 
+        if "switch.disabled" in event.name and switch:
+            self._per_switch.pop(switch, None)
+        if "switch.enabled" in event.name:
+            self._invalidate_lldp_count()
+
         try:
             installed_flows = self.get_flows_by_switch(switch.id)
         except tenacity.RetryError as err:
@@ -266,13 +364,14 @@ class Main(KytosNApp):
         if event_name == 'kytos/topology.switch.enabled':
             for flow in data['flows']:
                 flow.pop("cookie_mask", None)
-            res = httpx.post(endpoint, json=data, timeout=10)
+            res = self._http.post(endpoint, json=data, timeout=10)
             if res.is_server_error or res.status_code in client_error:
                 raise httpx.RequestError(res.text)
             self.use_vlan(switch)
 
         elif event_name == 'kytos/topology.switch.disabled':
-            res = httpx.request("DELETE", endpoint, json=data, timeout=10)
+            res = self._http.request("DELETE", endpoint, json=data,
+                                     timeout=10)
             if res.is_server_error or res.status_code in client_error:
                 raise httpx.RequestError(res.text)
             self.make_vlan_available(switch)
@@ -317,7 +416,7 @@ class Main(KytosNApp):
         endpoint = f'{settings.FLOW_MANAGER_URL}/stored_flows?state='\
                    f'installed&cookie_range={start}&cookie_range={end}'\
                    f'&dpid={dpid}'
-        res = httpx.get(endpoint)
+        res = self._http.get(endpoint)
         if res.is_server_error or res.status_code == 404:
             raise httpx.RequestError(res.text)
         if res.status_code == 400:
@@ -336,8 +435,7 @@ class Main(KytosNApp):
         ethernet = self._unpack_non_empty(Ethernet, event.message.data)
         if ethernet.ether_type == EtherType.LLDP:
             try:
-                lldp = self._unpack_non_empty(LLDP, ethernet.data)
-                dpid = self._unpack_non_empty(DPID, lldp.chassis_id.sub_value)
+                dpid, port_b = self._parse_self_lldp(ethernet.data.value)
             except struct.error:
                 #: If we have a LLDP packet but we cannot unpack it, or the
                 #: unpacked packet does not contain the dpid attribute, then
@@ -347,27 +445,21 @@ class Main(KytosNApp):
 
             switch_a = event.source.switch
             port_a = event.message.in_port
-            switch_b = None
-            port_b = None
 
             # in_port is currently an Int in v0x04.
-            if isinstance(port_a, int):
-                port_a = UBInt32(port_a)
+            if not isinstance(port_a, int):
+                port_a = port_a.value
 
-            try:
-                switch_b = self.controller.get_switch_by_dpid(dpid.value)
-                port_type = UBInt32
-                port_b = self._unpack_non_empty(port_type,
-                                                lldp.port_id.sub_value)
-            except AttributeError:
-                log.debug("Couldn't find datapath %s.", dpid.value)
+            switch_b = self.controller.get_switch_by_dpid(dpid)
+            if not switch_b:
+                log.debug("Couldn't find datapath %s.", dpid)
 
             # Return if any of the needed information are not available
             if not (switch_a and port_a and switch_b and port_b):
                 return
 
-            interface_a = switch_a.get_interface_by_port_no(port_a.value)
-            interface_b = switch_b.get_interface_by_port_no(port_b.value)
+            interface_a = switch_a.get_interface_by_port_no(port_a)
+            interface_b = switch_b.get_interface_by_port_no(port_b)
             if not interface_a or not interface_b:
                 return
 
@@ -398,6 +490,51 @@ class Main(KytosNApp):
     def shutdown(self):
         """End of the application."""
         log.debug('Shutting down...')
+        self._tick_pool.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
+        loop = self.controller.loop
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(
+                self.loop_manager.shutdown(), loop
+            )
+
+    def _pack_lldp_frame(self, buffer, source, dpid, port_number):
+        """Pack a LLDP Ethernet frame into a buffer.
+
+        The frame has the same layout Ethernet(VLAN(LLDP)) objects would be
+        packed to, with an 802.1Q tag only if a VLAN is configured.
+
+        Args:
+            buffer (bytearray): Buffer where the frame will be packed into.
+            source (str): Source MAC address.
+            dpid (str): Switch DPID sent on the chassis id TLV.
+            port_number (int): Port number sent on the port id TLV.
+
+        Returns:
+            The length of the frame packed at the beginning of the buffer.
+
+        """
+        lldp_fields = (
+            constants.LLDP_TLV_CHASSIS_ID << 9 | 9,
+            constants.LLDP_SUBTYPE_LOCAL,
+            int_dpid(dpid),
+            constants.LLDP_TLV_PORT_ID << 9 | 5,
+            constants.LLDP_SUBTYPE_LOCAL,
+            port_number,
+            constants.LLDP_TLV_TTL << 9 | 2,
+            constants.LLDP_TTL,
+            constants.LLDP_TLV_END,
+        )
+        destination = LLDP_MULTICAST_MAC_BYTES
+        source = mac_to_bytes(source)
+        if self.vlan_id is None:
+            LLDP_FRAME.pack_into(buffer, 0, destination, source,
+                                 EtherType.LLDP, *lldp_fields)
+            return LLDP_FRAME.size
+        LLDP_VLAN_FRAME.pack_into(buffer, 0, destination, source,
+                                  EtherType.VLAN, self.vlan_id,
+                                  EtherType.LLDP, *lldp_fields)
+        return LLDP_VLAN_FRAME.size
 
     @staticmethod
     def _build_lldp_packet_out(version, port_number, data):
@@ -463,6 +600,45 @@ class Main(KytosNApp):
 
         return flow
 
+    @staticmethod
+    def _parse_self_lldp(data: bytes) -> tuple[str, int]:
+        """Parse the chassis id and port id TLVs of a LLDP sent by of_lldp.
+
+        The LLDP packets sent by this NApp always start with the chassis id
+        TLV carrying the 8 bytes DPID followed by the port id TLV carrying
+        the port number, so both are read from fixed offsets instead of
+        unpacking a whole LLDP object.
+
+        Args:
+            data (bytes): LLDP payload of an Ethernet frame.
+
+        Returns:
+            A tuple with the DPID and the port number.
+
+        Raises:
+            struct.error if the LLDP packet wasn't generated by of_lldp.
+
+        """
+        chassis_header, chassis_subtype = LLDP_TLV_HEADER.unpack_from(data, 0)
+        if (
+            chassis_header != (constants.LLDP_TLV_CHASSIS_ID << 9 | 9)
+            or chassis_subtype != constants.LLDP_SUBTYPE_LOCAL
+        ):
+            raise struct.error("LLDP chassis id TLV not generated by of_lldp")
+        dpid = data[3:11].hex(":")
+
+        port_header, port_subtype = LLDP_TLV_HEADER.unpack_from(data, 11)
+        port_length = (port_header & 0x1FF) - 1
+        if (
+            port_header >> 9 != constants.LLDP_TLV_PORT_ID
+            or port_subtype != constants.LLDP_SUBTYPE_LOCAL
+            or port_length not in (2, 4)
+        ):
+            raise struct.error("LLDP port id TLV not generated by of_lldp")
+        port_format = "!I" if port_length == 4 else "!H"
+        port_number = struct.unpack_from(port_format, data, 14)[0]
+        return dpid, port_number
+
     @staticmethod
     def _unpack_non_empty(desired_class, data):
         """Unpack data using an instance of desired_class.
@@ -499,10 +675,17 @@ class Main(KytosNApp):
             interfaces += list(switch.interfaces.values())
         return interfaces
 
-    @staticmethod
-    def _get_interfaces_dict(interfaces):
-        """Return a dict of interfaces."""
-        return {inter.id: inter for inter in interfaces}
+    def _has_interfaces(self) -> bool:
+        """Check whether any switch has interfaces."""
+        return any(switch.interfaces
+                   for switch in list(self.controller.switches.values()))
+
+    def _get_interface_by_id(self, interface_id: str):
+        """Get an interface by its id or None if it isn't found."""
+        try:
+            return self.controller.get_interface_by_id(interface_id)
+        except ValueError:
+            return None
 
     def _get_lldp_interfaces(self):
         """Get interfaces enabled to receive LLDP packets."""
@@ -520,13 +703,11 @@ class Main(KytosNApp):
         error_list = []  # List of interfaces that were not activated.
         changed_interfaces = []
         interface_ids = filter(None, interface_ids)
-        interfaces = self._get_interfaces()
         intfs = []
-        if not interfaces:
+        if not self._has_interfaces():
             raise HTTPException(404, detail="No interfaces were found.")
-        interfaces = self._get_interfaces_dict(interfaces)
         for id_ in interface_ids:
-            interface = interfaces.get(id_)
+            interface = self._get_interface_by_id(id_)
             if interface:
                 interface.lldp = False
                 changed_interfaces.append(id_)
@@ -554,18 +735,17 @@ class Main(KytosNApp):
         error_list = []  # List of interfaces that were not activated.
         changed_interfaces = []
         interface_ids = filter(None, interface_ids)
-        interfaces = self._get_interfaces()
-        if not interfaces:
+        if not self._has_interfaces():
             raise HTTPException(404, detail="No interfaces were found.")
-        interfaces = self._get_interfaces_dict(interfaces)
         for id_ in interface_ids:
-            interface = interfaces.get(id_)
+            interface = self._get_interface_by_id(id_)
             if interface:
                 interface.lldp = True
                 changed_interfaces.append(id_)
             else:
                 error_list.append(id_)
         if changed_interfaces:
+            self._invalidate_lldp_count()
             self.notify_lldp_change('enabled', changed_interfaces)
         if not error_list:
             return JSONResponse(
@@ -650,19 +830,19 @@ class Main(KytosNApp):
         """Get liveness interface pairs."""
         pairs = []
         for entry in list(self.liveness_manager.liveness.values()):
-            lsm = entry["lsm"]
+            lsm = entry.lsm
             pair = {
                 "interface_a": {
-                    "id": entry["interface_a"].id,
-                    "status": lsm.ilsm_a.state,
+                    "id": entry.interface_a.id,
+                    "status": lsm.ilsm_a.state.name,
                     "last_hello_at": lsm.ilsm_a.last_hello_at,
                 },
                 "interface_b": {
-                    "id": entry["interface_b"].id,
-                    "status": lsm.ilsm_b.state,
+                    "id": entry.interface_b.id,
+                    "status": lsm.ilsm_b.state.name,
                     "last_hello_at": lsm.ilsm_b.last_hello_at,
                 },
-                "status": lsm.state
+                "status": lsm.state.name
             }
             pairs.append(pair)
         return JSONResponse({"pairs": pairs})
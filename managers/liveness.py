@@ -1,8 +1,50 @@
 """LivenessManager."""
-from typing import Optional, Tuple
-from datetime import datetime
+import sys
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Optional, Tuple
+from datetime import datetime, timezone
 from kytos.core import KytosEvent, log
 from kytos.core.common import EntityStatus
+from napps.kytos.of_lldp.utils import put_many
+
+
+class LivenessState(IntEnum):
+    """LivenessState Enum.
+
+    Its values index the transition tables, its names are the states
+    exposed on events and on the API.
+    """
+
+    init = 0
+    up = 1
+    down = 2
+
+
+# Allowed transitions indexed by [from_state][to_state]
+_TRANSITIONS: tuple[tuple[bool, ...], ...] = (
+    (False, True, True),
+    (True, False, True),
+    (True, True, False),
+)
+
+# Aggregated LSM state indexed by (ilsm_a.state << 2) | ilsm_b.state, each
+# row is padded to four entries so the index is a shift and an or
+_AGG_STATES: tuple[LivenessState, ...] = tuple(
+    state
+    for row in (
+        (LivenessState.init, LivenessState.init, LivenessState.init),
+        (LivenessState.init, LivenessState.up, LivenessState.down),
+        (LivenessState.init, LivenessState.down, LivenessState.down),
+    )
+    for state in (*row, LivenessState.init)
+)
+
+# LSM event names indexed by state
+_LSM_EVENT_NAMES: tuple[str, ...] = tuple(
+    f"kytos/of_lldp.liveness.{state.name}" for state in LivenessState
+)
 
 
 class ILSM:
@@ -14,81 +56,104 @@ class ILSM:
     this state machine should call the transition accordingly.
     """
 
-    def __init__(self, state="init") -> None:
+    __slots__ = ("state", "last_hello_ts", "last_hello_wall")
+
+    def __init__(self, state: LivenessState = LivenessState.init) -> None:
         """InterfaceLivenessStateMachine."""
-        self.transitions = {
-            "init": ["up", "down"],
-            "up": ["down", "init"],
-            "down": ["up", "init"],
-        }
         self.state = state
-        self.last_hello_at: Optional[datetime] = None
+        self.last_hello_ts = 0.0  # time.monotonic() of the last hello
+        self.last_hello_wall = 0.0  # time.time() of the last hello
 
     def __repr__(self) -> str:
         """Repr."""
-        return f"ILSM({self.state}, {self.last_hello_at})"
+        return f"ILSM({self.state.name}, {self.last_hello_at})"
 
-    def transition_to(self, to_state: str) -> Optional[str]:
+    @property
+    def last_hello_at(self) -> Optional[datetime]:
+        """UTC datetime of the last hello."""
+        if not self.last_hello_wall:
+            return None
+        return datetime.fromtimestamp(
+            self.last_hello_wall, timezone.utc
+        ).replace(tzinfo=None)
+
+    def transition_to(
+        self, to_state: LivenessState
+    ) -> Optional[LivenessState]:
         """Try to transition to a state."""
-        if to_state not in self.transitions[self.state]:
+        if not _TRANSITIONS[self.state][to_state]:
             return None
         self.state = to_state
         return self.state
 
-    def reaper_check(self, dead_interval: int) -> Optional[str]:
-        """Try to transition to down. It must be called every dead_interval."""
-        if (
-            self.last_hello_at and
-            (datetime.utcnow() - self.last_hello_at).seconds > dead_interval
-        ):
-            return self.transition_to("down")
+    def reaper_check(
+        self, dead_interval: int, now_ts: float
+    ) -> Optional[LivenessState]:
+        """Try to transition to down. It must be called every dead_interval.
+
+        now_ts is the time.monotonic() of the current reaper sweep.
+        """
+        if not self.last_hello_ts:
+            return None
+        if int(now_ts - self.last_hello_ts) > dead_interval:
+            return self.transition_to(LivenessState.down)
         return None
 
-    def consume_hello(self, received_at: datetime) -> Optional[str]:
+    def consume_hello(self, received_ts: float) -> Optional[LivenessState]:
         """Consume hello. It must be called on every received hello."""
-        self.last_hello_at = received_at
-        if self.transition_to("up"):
-            return "up"
-        return None
+        self.last_hello_ts = received_ts
+        self.last_hello_wall = time.time()
+        if self.state == LivenessState.up:
+            return None
+        self.state = LivenessState.up
+        return LivenessState.up
 
 
 class LSM:
 
     """LivenessStateMachine aggregates two resulting ILSM acts like a link."""
 
-    def __init__(self, ilsm_a: ILSM, ilsm_b: ILSM, state="init") -> None:
+    __slots__ = ("ilsm_a", "ilsm_b", "state")
+
+    def __init__(self, ilsm_a: ILSM, ilsm_b: ILSM,
+                 state: LivenessState = LivenessState.init) -> None:
         """LinkLivenessStateMachine."""
         self.ilsm_a = ilsm_a
         self.ilsm_b = ilsm_b
         self.state = state
-        self.transitions = self.ilsm_a.transitions
 
     def __repr__(self) -> str:
         """Repr."""
-        return f"LSM({self.agg_state()}, {self.ilsm_a}, {self.ilsm_b})"
+        return f"LSM({self.agg_state().name}, {self.ilsm_a}, {self.ilsm_b})"
 
-    def agg_state(self) -> str:
+    def agg_state(self) -> LivenessState:
         """Aggregated state."""
-        if self.ilsm_a.state == "init" or self.ilsm_b.state == "init":
-            return "init"
-        if self.ilsm_a.state == "down" or self.ilsm_b.state == "down":
-            return "down"
-        if self.ilsm_a.state == "up" and self.ilsm_b.state == "up":
-            return "up"
-        return "init"
-
-    def _transition_to(self, to_state: str) -> Optional[str]:
+        return _AGG_STATES[(self.ilsm_a.state << 2) | self.ilsm_b.state]
+
+    def _transition_to(
+        self, to_state: LivenessState
+    ) -> Optional[LivenessState]:
         """Try to transition to a state."""
-        if to_state not in self.transitions[self.state]:
+        if not _TRANSITIONS[self.state][to_state]:
             return None
         self.state = to_state
         return self.state
 
-    def next_state(self) -> Optional[str]:
+    def next_state(self) -> Optional[LivenessState]:
         """Next state."""
         return self._transition_to(self.agg_state())
 
 
+@dataclass(slots=True)
+class LivenessEntry:
+
+    """Liveness of a pair of interfaces, interface_a has the lowest id."""
+
+    lsm: LSM
+    interface_a: Any
+    interface_b: Any
+
+
 class LivenessManager:
 
     """LivenessManager."""
@@ -98,18 +163,24 @@ class LivenessManager:
 
         self.controller = controller
 
-        self.interfaces = {}  # liveness enabled
-        self.liveness = {}  # indexed by the lowest interface id of the pair
-        self.liveness_ids = {}  # interface id to lowest id of the pair
+        # liveness enabled
+        self.interfaces: dict[str, Any] = {}
+        # indexed by the lowest interface id of the pair
+        self.liveness: dict[str, LivenessEntry] = {}
+        # interface id to lowest id of the pair
+        self.liveness_ids: dict[str, str] = {}
+        # interface id to its ILSM
+        self._ilsm_by_id: dict[str, ILSM] = {}
+        # lowest ids of the pairs that got hellos and aren't down yet
+        self._active_ids: set[str] = set()
 
     @classmethod
     def link_status_hook_liveness(cls, link) -> Optional[EntityStatus]:
         """Link status hook liveness."""
         if (
-            link.is_active()
+            link.metadata.get("liveness_status", "up") != "up"
+            and link.is_active()
             and link.is_enabled()
-            and "liveness_status" in link.metadata
-            and link.metadata["liveness_status"] != "up"
         ):
             return EntityStatus.DOWN
         return None
@@ -121,139 +192,176 @@ class LivenessManager:
                 return False
         return True
 
+    def _is_enabled_pair(self, interface_a, interface_b) -> bool:
+        """Check if liveness is enabled on both interfaces of a pair."""
+        interfaces = self.interfaces
+        return interface_a.id in interfaces and interface_b.id in interfaces
+
     def enable(self, *interfaces) -> None:
         """Enable liveness on interface."""
         for interface in interfaces:
-            self.interfaces[interface.id] = interface
+            self.interfaces[sys.intern(interface.id)] = interface
 
     def disable(self, *interfaces) -> None:
         """Disable liveness interface."""
         for interface in interfaces:
             self.interfaces.pop(interface.id, None)
             min_id = self.liveness_ids.pop(interface.id, None)
-            self.liveness.pop(min_id, None)
+            self._ilsm_by_id.pop(interface.id, None)
+            entry = self.liveness.pop(min_id, None)
+            self._active_ids.discard(min_id)
+            if entry is not None:
+                self._pop_liveness_ids(min_id, entry.interface_a,
+                                       entry.interface_b)
+
+    def _pop_liveness_ids(self, min_id: str, *interfaces) -> None:
+        """Pop the interfaces liveness ids still mapped to min_id."""
+        for interface in interfaces:
+            if self.liveness_ids.get(interface.id) == min_id:
+                del self.liveness_ids[interface.id]
+                self._ilsm_by_id.pop(interface.id, None)
+
+    @staticmethod
+    def _build_lsm_event(
+        state: LivenessState, interface_a, interface_b
+    ) -> KytosEvent:
+        """Build a LSM event."""
+        content = {"interface_a": interface_a, "interface_b": interface_b}
+        return KytosEvent(name=_LSM_EVENT_NAMES[state], content=content)
 
     async def atry_to_publish_lsm_event(
-        self, event_suffix: str, interface_a, interface_b
+        self, state: Optional[LivenessState], interface_a, interface_b
     ) -> None:
         """Async try to publish a LSM event."""
-        if not event_suffix:
+        if state is None:
             return
-        name = f"kytos/of_lldp.liveness.{event_suffix}"
-        content = {"interface_a": interface_a, "interface_b": interface_b}
-        event = KytosEvent(name=name, content=content)
+        event = self._build_lsm_event(state, interface_a, interface_b)
         await self.controller.buffers.app.aput(event)
 
     def try_to_publish_lsm_event(
-        self, event_suffix: str, interface_a, interface_b
+        self, state: Optional[LivenessState], interface_a, interface_b
     ) -> None:
         """Try to publish a LSM event."""
-        if not event_suffix:
+        if state is None:
             return
-        name = f"kytos/of_lldp.liveness.{event_suffix}"
-        content = {"interface_a": interface_a, "interface_b": interface_b}
-        event = KytosEvent(name=name, content=content)
+        event = self._build_lsm_event(state, interface_a, interface_b)
         self.controller.buffers.app.put(event)
 
-    async def consume_hello_if_enabled(self, interface_a, interface_b):
+    async def consume_hello_if_enabled(self, interface_a,
+                                       interface_b) -> None:
         """Consume liveness hello if enabled."""
-        if not self.is_enabled(interface_a, interface_b):
+        if not self._is_enabled_pair(interface_a, interface_b):
             return
-        await self.consume_hello(interface_a, interface_b, datetime.utcnow())
+        await self.consume_hello(interface_a, interface_b, time.monotonic())
 
     def get_interface_status(
-        self, interface_id
+        self, interface_id: str
     ) -> Tuple[Optional[str], Optional[datetime]]:
         """Get interface status."""
         if interface_id not in self.interfaces:
             return None, None
-        min_id = self.liveness_ids.get(interface_id)
-        if min_id and min_id in self.liveness:
-            lsm = self.liveness[min_id]["lsm"]
-            if interface_id == min_id:
-                return lsm.ilsm_a.state, lsm.ilsm_a.last_hello_at
-            else:
-                return lsm.ilsm_b.state, lsm.ilsm_b.last_hello_at
-        return "init", None
+        ilsm = self._ilsm_by_id.get(interface_id)
+        if ilsm is None:
+            return LivenessState.init.name, None
+        return ilsm.state.name, ilsm.last_hello_at
 
     async def consume_hello(
-        self, interface_a, interface_b, received_at: datetime
+        self, interface_a, interface_b, received_ts: float
     ) -> None:
         """Consume liveness hello event."""
-        min_id = min(interface_a.id, interface_b.id)
-        is_interface_a_min_id = min_id == interface_a.id
-        if min_id not in self.liveness:
-            lsm = LSM(ILSM(state="init"), ILSM(state="init"))
-            entry = {
-                "lsm": lsm,
-            }
+        is_interface_a_min_id = interface_a.id <= interface_b.id
+        if is_interface_a_min_id:
+            min_id = interface_a.id
+        else:
+            min_id = interface_b.id
+        entry = self.liveness.get(min_id)
+        if entry is None:
+            min_id = sys.intern(min_id)
+            lsm = LSM(ILSM(), ILSM())
             if is_interface_a_min_id:
-                entry["interface_a"], entry["interface_b"] = interface_a, interface_b
+                entry = LivenessEntry(lsm, interface_a, interface_b)
             else:
-                entry["interface_a"], entry["interface_b"] = interface_b, interface_a
+                entry = LivenessEntry(lsm, interface_b, interface_a)
             self.liveness[min_id] = entry
-            self.liveness_ids[interface_a.id] = min_id
-            self.liveness_ids[interface_b.id] = min_id
+            self.liveness_ids[sys.intern(interface_a.id)] = min_id
+            self.liveness_ids[sys.intern(interface_b.id)] = min_id
+            self._ilsm_by_id[entry.interface_a.id] = lsm.ilsm_a
+            self._ilsm_by_id[entry.interface_b.id] = lsm.ilsm_b
 
-        entry = self.liveness[min_id]
-        lsm = entry["lsm"]
+        lsm = entry.lsm
         if is_interface_a_min_id:
-            lsm.ilsm_a.consume_hello(received_at)
-            if entry["interface_b"].id != interface_b.id:
+            changed = lsm.ilsm_a.consume_hello(received_ts) is not None
+            if entry.interface_b.id != interface_b.id:
                 """
                 Implies that the topology connection has changed, needs new ref
                 """
-                entry["interface_b"] = interface_b
-                entry["lsm"].ilsm_b = ILSM(state="init")
+                self._pop_liveness_ids(min_id, entry.interface_b)
+                self.liveness_ids[sys.intern(interface_b.id)] = min_id
+                entry.interface_b = interface_b
+                entry.lsm.ilsm_b = ILSM()
+                self._ilsm_by_id[interface_b.id] = entry.lsm.ilsm_b
+                changed = True
         else:
-            lsm.ilsm_b.consume_hello(received_at)
+            changed = lsm.ilsm_b.consume_hello(received_ts) is not None
+        self._active_ids.add(min_id)
+        if not changed:
+            # The aggregated state can only change if an ILSM changed
+            return
 
         lsm_next_state = lsm.next_state()
+        next_state_name = (
+            lsm_next_state.name if lsm_next_state is not None else None
+        )
         log.debug(
             f"Liveness hello {interface_a.id} <- {interface_b.id}"
-            f" next state: {lsm_next_state}, lsm: {lsm}"
+            f" next state: {next_state_name}, lsm: {lsm}"
         )
         await self.atry_to_publish_lsm_event(lsm_next_state, interface_a, interface_b)
 
     def should_call_reaper(self, interface) -> bool:
         """Should call reaper."""
-        if all(
-            (
-                interface.switch.is_connected(),
-                interface.lldp,
-                self.is_enabled(interface),
-            )
-        ):
-            return True
-        return False
+        return bool(
+            interface.switch.is_connected()
+            and interface.lldp
+            and interface.id in self.interfaces
+        )
 
-    def reaper(self, dead_interval: int):
+    def reaper(self, dead_interval: int) -> None:
         """Reaper check processable interfaces."""
-        for value in list(self.liveness.values()):
+        now_ts = time.monotonic()
+        events = []
+        # reaper runs on a thread while hellos are consumed on the event
+        # loop, so iterate over a snapshot of the ids only
+        for min_id in tuple(self._active_ids):
+            entry = self.liveness.get(min_id)
+            if entry is None or entry.lsm.state == LivenessState.down:
+                self._active_ids.discard(min_id)
+                continue
             lsm, intf_a, intf_b = (
-                value["lsm"],
-                value["interface_a"],
-                value["interface_b"],
+                entry.lsm,
+                entry.interface_a,
+                entry.interface_b,
             )
-            if any(
-                (
-                    lsm.state == "down",
-                    not self.should_call_reaper(intf_a),
-                    not self.should_call_reaper(intf_b),
-                )
+            if (
+                not self.should_call_reaper(intf_a)
+                or not self.should_call_reaper(intf_b)
             ):
                 continue
 
-            lsm.ilsm_a.reaper_check(dead_interval)
-            lsm.ilsm_b.reaper_check(dead_interval)
+            lsm.ilsm_a.reaper_check(dead_interval, now_ts)
+            lsm.ilsm_b.reaper_check(dead_interval, now_ts)
             lsm_next_state = lsm.next_state()
+            if lsm_next_state == LivenessState.down:
+                self._active_ids.discard(min_id)
 
-            if all(
-                (
-                    intf_a.status == EntityStatus.UP,
-                    intf_b.status == EntityStatus.UP,
-                )
+            if (
+                lsm_next_state is not None
+                and intf_a.status == EntityStatus.UP
+                and intf_b.status == EntityStatus.UP
             ):
-                self.try_to_publish_lsm_event(
-                    lsm_next_state, value["interface_a"], value["interface_b"]
+                events.append(
+                    self._build_lsm_event(lsm_next_state, intf_a, intf_b)
                 )
+
+        if events:
+            put_many(self.controller.buffers.app, events)
@@ -1,21 +1,77 @@
 """LoopManager."""
 import asyncio
+import sys
+import time
 from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from enum import Enum
+from typing import Optional
 
 import httpx
 
 from kytos.core import KytosEvent, log
 from kytos.core.interface import Interface
-from kytos.core.helpers import get_time, now
 from napps.kytos.of_lldp import settings as napp_settings
 
 
+LOOP_STATE_DETECTED = "detected"
+LOOP_STATE_STOPPED = "stopped"
+
+
 class LoopState(str, Enum):
     """LoopState Enum."""
 
-    detected = "detected"
-    stopped = "stopped"
+    detected = LOOP_STATE_DETECTED
+    stopped = LOOP_STATE_STOPPED
+
+
+@dataclass(slots=True)
+class LoopEntry:
+    """State of a looped port pair."""
+
+    state: str
+    port_numbers: list
+    updated_at: str
+    updated_ts: float
+    detected_at: str
+    stopped_at: Optional[str] = None
+
+
+# epoch second and its ISO string last formatted by _iso_now
+_iso_now_cache = (-1, "")
+
+
+def _iso_now() -> str:
+    """Return the current UTC time as an ISO string, cached per second."""
+    global _iso_now_cache  # pylint: disable=global-statement
+    epoch = int(time.time())
+    cached_epoch, iso = _iso_now_cache
+    if epoch != cached_epoch:
+        dt_now = datetime.fromtimestamp(epoch, timezone.utc)
+        iso = dt_now.strftime("%Y-%m-%dT%H:%M:%S")
+        _iso_now_cache = (epoch, iso)
+    return iso
+
+
+_EMPTY: frozenset = frozenset()
+
+
+def _sorted_pair(port_a: int, port_b: int) -> tuple[int, int]:
+    """Return the port pair as (min, max)."""
+    return (port_a, port_b) if port_a <= port_b else (port_b, port_a)
+
+
+def _to_ignored_pairs(port_pairs) -> frozenset[tuple[int, int]]:
+    """Build the set of (min, max) port pairs of the ignored loops."""
+    return frozenset(
+        _sorted_pair(*port_pair)
+        for port_pair in port_pairs
+        if isinstance(port_pair, list)
+        and len(port_pair) == 2
+        and isinstance(port_pair[0], int)
+        and isinstance(port_pair[1], int)
+    )
 
 
 class LoopManager:
@@ -24,36 +80,62 @@ class LoopManager:
     def __init__(self, controller, settings=napp_settings):
         """Constructor of LoopDetection."""
         self.controller = controller
-        self.loop_lock = asyncio.Lock()
-        self.loop_counter = defaultdict(dict)
-        self.loop_state = defaultdict(dict)
+        self._dpid_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.loop_counter: dict[tuple[str, tuple], int] = {}
+        self.loop_state: dict[tuple[str, tuple], LoopEntry] = {}
 
         self.settings = settings
-        self.ignored_loops = settings.LLDP_IGNORED_LOOPS
+        self.ignored_loops = {
+            dpid: _to_ignored_pairs(port_pairs)
+            for dpid, port_pairs in settings.LLDP_IGNORED_LOOPS.items()
+        }
         self.actions = settings.LLDP_LOOP_ACTIONS
         self.dead_multiplier = int(napp_settings.LLDP_LOOP_DEAD_MULTIPLIER)
         self.stopped_interval = self.dead_multiplier * settings.POLLING_TIME
         self.log_every = settings.LOOP_LOG_EVERY
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def actions(self) -> frozenset[str]:
+        """Loop actions."""
+        return self._actions
+
+    @actions.setter
+    def actions(self, actions) -> None:
+        """Set loop actions and the flags derived from them."""
+        self._actions = frozenset(actions)
+        self._supported_actions = tuple(
+            self._actions.intersection({"log", "disable"})
+        )
+        self._log_enabled = "log" in self._supported_actions
+        self._disable_enabled = "disable" in self._supported_actions
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """Get the topology HTTP client, creating it on first use."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.settings.TOPOLOGY_URL,
+                timeout=10,
+                limits=httpx.Limits(max_keepalive_connections=32),
+            )
+        return self._http
+
+    async def shutdown(self) -> None:
+        """Close the topology HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
     def is_loop_ignored(self, dpid, port_a, port_b):
         """Check if a loop is ignored."""
-        if dpid not in self.ignored_loops:
-            return False
-        if any(
-            (
-                [port_a, port_b] in self.ignored_loops[dpid],
-                [port_b, port_a] in self.ignored_loops[dpid],
-            )
-        ):
-            return True
-        return False
+        port_pair = _sorted_pair(port_a, port_b)
+        return port_pair in self.ignored_loops.get(dpid, _EMPTY)
 
     @staticmethod
     def is_looped(dpid_a, port_a, dpid_b, port_b):
         """Check if the given dpids and ports are looped."""
-        if all((dpid_a == dpid_b, port_a <= port_b)):  # only enter one pair
-            return True
-        return False
+        # only enter one pair
+        return dpid_a == dpid_b and port_a <= port_b
 
     async def process_if_looped(
         self,
@@ -65,19 +147,17 @@ class LoopManager:
         dpid_b = interface_b.switch.dpid
         port_a = interface_a.port_number
         port_b = interface_b.port_number
-        if all(
-            (
-                self.is_looped(dpid_a, port_a, dpid_b, port_b),
-                not self.is_loop_ignored(dpid_a, port_a, port_b),
-            )
-        ):
-            await self.set_loop_detected(interface_a, [port_a, port_b])
-            await self.apublish_loop_state(
-                interface_a, interface_b, LoopState.detected.value
-            )
-            await self.publish_loop_actions(interface_a, interface_b)
-            return True
-        return False
+        if not self.is_looped(dpid_a, port_a, dpid_b, port_b):
+            return False
+        if self.is_loop_ignored(dpid_a, port_a, port_b):
+            return False
+
+        await self.set_loop_detected(interface_a, (port_a, port_b))
+        await self.apublish_loop_state(
+            interface_a, interface_b, LOOP_STATE_DETECTED
+        )
+        await self.publish_loop_actions(interface_a, interface_b)
+        return True
 
     def publish_loop_state(
         self,
@@ -125,93 +205,84 @@ class LoopManager:
         interface_b,
     ):
         """Publish loop action events."""
-        supported_actions = {"log", "disable"}
-        for action in set(self.actions).intersection(supported_actions):
-            event = KytosEvent(
-                name=f"kytos/of_lldp.loop.action.{action}",
-                content={
-                    "interface_a": interface_a,
-                    "interface_b": interface_b,
-                },
+        content = {"interface_a": interface_a, "interface_b": interface_b}
+        buffer = self.controller.buffers.app
+        await asyncio.gather(
+            *(
+                buffer.aput(
+                    KytosEvent(
+                        name=f"kytos/of_lldp.loop.action.{action}",
+                        content=content,
+                    )
+                )
+                for action in self._supported_actions
             )
-            await self.controller.buffers.app.aput(event)
+        )
 
-    async def set_loop_detected(self, interface_a: Interface, port_pair: list):
+    async def set_loop_detected(
+        self, interface_a: Interface, port_pair: tuple[int, int]
+    ):
         """Set loop detected."""
-        is_new_loop = False
-        port_pair, dpid = tuple(port_pair), interface_a.switch.dpid
-        async with self.loop_lock:
-            if port_pair not in self.loop_state[dpid]:
-                dt_at = now().strftime("%Y-%m-%dT%H:%M:%S")
-                data = {
-                    "state": LoopState.detected.value,
-                    "port_numbers": list(port_pair),
-                    "updated_at": dt_at,
-                    "detected_at": dt_at,
-                }
-                self.loop_state[dpid][port_pair] = data
-                is_new_loop = True
-            if (
-                self.loop_state[dpid][port_pair]["state"]
-                != LoopState.detected.value
-            ):
-                dt_at = now().strftime("%Y-%m-%dT%H:%M:%S")
-                data = {
-                    "state": LoopState.detected.value,
-                    "updated_at": dt_at,
-                    "detected_at": dt_at,
-                }
-                self.loop_state[dpid][port_pair].update(data)
-                self.loop_state[dpid][port_pair].pop("stopped_at", None)
-                is_new_loop = True
+        dpid = interface_a.switch.dpid
+        async with self._dpid_locks[dpid]:
+            key = (dpid, port_pair)
+            entry = self.loop_state.get(key)
+            dt_at, updated_ts = _iso_now(), time.time()
+            if entry is not None and entry.state == LOOP_STATE_DETECTED:
+                entry.updated_at = dt_at
+                entry.updated_ts = updated_ts
+                return
+
+            if entry is None:
+                key = (sys.intern(dpid), port_pair)
+                entry = LoopEntry(
+                    state=LOOP_STATE_DETECTED,
+                    port_numbers=[port_pair[0], port_pair[1]],
+                    updated_at=dt_at,
+                    updated_ts=updated_ts,
+                    detected_at=dt_at,
+                )
+                self.loop_state[key] = entry
             else:
-                data = {"updated_at": now().strftime("%Y-%m-%dT%H:%M:%S")}
-                self.loop_state[dpid][port_pair].update(data)
-
-            if is_new_loop:
-                port_numbers = self.loop_state[dpid][port_pair]["port_numbers"]
-                detected_at = self.loop_state[dpid][port_pair]["detected_at"]
-                metadata = {
-                    "looped": {
-                        "port_numbers": port_numbers,
-                        "detected_at": detected_at,
-                    }
-                }
-                interface_a.extend_metadata(metadata)
+                entry.state = LOOP_STATE_DETECTED
+                entry.updated_at = dt_at
+                entry.updated_ts = updated_ts
+                entry.detected_at = dt_at
+                entry.stopped_at = None
+
+            looped = {
+                "port_numbers": entry.port_numbers,
+                "detected_at": entry.detected_at,
+            }
+            if interface_a.metadata.get("looped") != looped:
+                interface_a.extend_metadata({"looped": looped})
 
     def has_loop_stopped(self, dpid, port_pair):
         """Check if a loop has stopped by checking within an interval
         or based on their operational state."""
-        data = self.loop_state[dpid].get(port_pair)
+        entry = self.loop_state.get((dpid, port_pair))
         switch = self.controller.get_switch_by_dpid(dpid)
-        if not data or not switch:
+        if not entry or not switch:
             return None
-        try:
-            interface_a = switch.interfaces[port_pair[0]]
-            interface_b = switch.interfaces[port_pair[1]]
-        except KeyError:
+        interfaces = switch.interfaces
+        interface_a = interfaces.get(port_pair[0])
+        interface_b = interfaces.get(port_pair[1])
+        if interface_a is None or interface_b is None:
             return None
 
-        if not interface_a.is_active() or not interface_b.is_active():
+        if not (interface_a.is_active() and interface_b.is_active()):
             return True
 
-        delta_seconds = (now() - get_time(data["updated_at"])).seconds
-        if delta_seconds > self.stopped_interval:
-            return True
-        return False
+        return time.time() - entry.updated_ts > self.stopped_interval
 
     def get_stopped_loops(self):
         """Get stopped loops."""
         stopped_loops = {}
-        for key, state_dict in self.loop_state.copy().items():
-            for port_pair, values in state_dict.items():
-                if values["state"] != LoopState.detected.value:
-                    continue
-                if self.has_loop_stopped(key, port_pair):
-                    if key not in stopped_loops:
-                        stopped_loops[key] = [port_pair]
-                    else:
-                        stopped_loops[key].append(port_pair)
+        for (dpid, port_pair), entry in tuple(self.loop_state.items()):
+            if entry.state != LOOP_STATE_DETECTED:
+                continue
+            if self.has_loop_stopped(dpid, port_pair):
+                stopped_loops.setdefault(dpid, []).append(port_pair)
         return stopped_loops
 
     async def handle_loop_stopped(self, interface_a: Interface,
@@ -222,17 +293,16 @@ class LoopManager:
         port_b = interface_b.port_number
         port_pair = (port_a, port_b)
 
-        async with self.loop_lock:
-            if port_pair not in self.loop_state[dpid]:
+        async with self._dpid_locks[dpid]:
+            entry = self.loop_state.get((dpid, port_pair))
+            if entry is None:
                 return
 
-            dt_at = now().strftime("%Y-%m-%dT%H:%M:%S")
-            data = {
-                "state": "stopped",
-                "updated_at": dt_at,
-                "stopped_at": dt_at,
-            }
-            self.loop_state[dpid][port_pair].update(data)
+            dt_at = _iso_now()
+            entry.state = LOOP_STATE_STOPPED
+            entry.updated_at = dt_at
+            entry.updated_ts = time.time()
+            entry.stopped_at = dt_at
             key = "looped"
             if not interface_a.remove_metadata(key):
                 log.error(
@@ -240,35 +310,34 @@ class LoopManager:
                     f"{interface_a.id}",
                 )
 
-        if "log" in self.actions:
+        if self._log_enabled:
             log.info(
                 f"LLDP loop stopped on switch: {dpid}, "
                 f"interfaces: {[interface_a.name, interface_b.name]}, "
                 f"port_numbers: {[port_a, port_b]}"
             )
-        if "disable" in self.actions:
-            base_url = self.settings.TOPOLOGY_URL
-            async with httpx.AsyncClient(base_url=base_url) as client:
-                endpoint = f"/interfaces/{interface_a.id}/enable"
-                try:
-                    resp = await client.post(endpoint, timeout=10)
-                    if resp.status_code != 200:
-                        log.error(
-                            f"Failed to enable interface: {interface_a.id},"
-                            f" status code: {resp.status_code}, {resp.text}"
-                        )
-                    else:
-                        log.info(
-                            "LLDP loop detection enabled interface "
-                            f"{interface_a.id}, looped interfaces: "
-                            f"{[interface_a.name, interface_b.name]},"
-                            f"port_numbers: {[port_a, port_b]}"
-                        )
-                except httpx.RequestError as exc:
+        if self._disable_enabled:
+            client = self._get_http()
+            endpoint = f"/interfaces/{interface_a.id}/enable"
+            try:
+                resp = await client.post(endpoint)
+                if resp.status_code != 200:
                     log.error(
-                        f"Failed to enable interface: {interface_a.id}, "
-                        f"error: {exc}"
+                        f"Failed to enable interface: {interface_a.id},"
+                        f" status code: {resp.status_code}, {resp.text}"
+                    )
+                else:
+                    log.info(
+                        "LLDP loop detection enabled interface "
+                        f"{interface_a.id}, looped interfaces: "
+                        f"{[interface_a.name, interface_b.name]},"
+                        f"port_numbers: {[port_a, port_b]}"
                     )
+            except httpx.RequestError as exc:
+                log.error(
+                    f"Failed to enable interface: {interface_a.id}, "
+                    f"error: {exc}"
+                )
 
     async def handle_log_action(
         self,
@@ -281,13 +350,10 @@ class LoopManager:
         port_b = interface_b.port_number
         port_pair = (port_a, port_b)
         log_every = self.log_every
-        async with self.loop_lock:
-            if port_pair not in self.loop_counter[dpid]:
-                self.loop_counter[dpid][port_pair] = 0
-            else:
-                self.loop_counter[dpid][port_pair] += 1
-                self.loop_counter[dpid][port_pair] %= log_every
-            count = self.loop_counter[dpid][port_pair]
+        async with self._dpid_locks[dpid]:
+            key = (dpid, port_pair)
+            count = (self.loop_counter.get(key, -1) + 1) % log_every
+            self.loop_counter[key] = count
             if count != 0:
                 return
 
@@ -309,34 +375,33 @@ class LoopManager:
         port_a = interface_a.port_number
         port_b = interface_b.port_number
         intf_id = interface_a.id
-        base_url = self.settings.TOPOLOGY_URL
-        async with httpx.AsyncClient(base_url=base_url) as client:
-            endpoint = f"/interfaces/{intf_id}/disable"
-            try:
-                resp = await client.post(endpoint, timeout=10)
-                if resp.status_code != 200:
-                    log.error(
-                        f"Failed to disable interface: {intf_id},"
-                        f" status code: {resp.status_code}, {resp.text}"
-                    )
-                    return
-
-                log.info(
-                    "LLDP loop detection disabled interface "
-                    f"{interface_a.id}, looped interfaces: "
-                    f"{[interface_a.name, interface_b.name]}, "
-                    f"port_numbers: {[port_a, port_b]}"
-                )
-            except httpx.RequestError as exc:
+        client = self._get_http()
+        endpoint = f"/interfaces/{intf_id}/disable"
+        try:
+            resp = await client.post(endpoint)
+            if resp.status_code != 200:
                 log.error(
-                    f"Failed to disable interface: {interface_a.id}, "
-                    f"error: {exc}"
+                    f"Failed to disable interface: {intf_id},"
+                    f" status code: {resp.status_code}, {resp.text}"
                 )
+                return
+
+            log.info(
+                "LLDP loop detection disabled interface "
+                f"{interface_a.id}, looped interfaces: "
+                f"{[interface_a.name, interface_b.name]}, "
+                f"port_numbers: {[port_a, port_b]}"
+            )
+        except httpx.RequestError as exc:
+            log.error(
+                f"Failed to disable interface: {interface_a.id}, "
+                f"error: {exc}"
+            )
 
     async def handle_switch_metadata_changed(self, switch):
         """Handle switch metadata changed."""
         if "ignored_loops" not in switch.metadata:
-            async with self.loop_lock:
+            async with self._dpid_locks[switch.dpid]:
                 return self.ignored_loops.pop(switch.dpid, None)
         return await self.try_to_load_ignored_switch(switch)
 
@@ -347,14 +412,16 @@ class LoopManager:
         if not isinstance(switch.metadata["ignored_loops"], list):
             return
 
-        dpid = switch.dpid
-        async with self.loop_lock:
-            self.ignored_loops[dpid] = []
-            for port_pair in switch.metadata["ignored_loops"]:
-                if isinstance(port_pair, list):
-                    self.ignored_loops[dpid].append(port_pair)
+        dpid = sys.intern(switch.dpid)
+        port_pairs = _to_ignored_pairs(switch.metadata["ignored_loops"])
+        async with self._dpid_locks[dpid]:
+            self.ignored_loops[dpid] = port_pairs
 
     async def handle_topology_loaded(self, topology):
         """Handle on topology loaded."""
-        for switch in topology.switches.values():
-            await self.try_to_load_ignored_switch(switch)
+        await asyncio.gather(
+            *(
+                self.try_to_load_ignored_switch(switch)
+                for switch in topology.switches.values()
+            )
+        )
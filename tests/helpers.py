@@ -3,6 +3,8 @@ from unittest.mock import MagicMock
 
 from kytos.lib.helpers import (get_interface_mock, get_link_mock,
                                get_switch_mock)
+from pyof.foundation.basic_types import DPID, UBInt32
+from pyof.foundation.network_types import LLDP
 
 
 def get_topology_mock():
@@ -16,10 +18,10 @@ def get_topology_mock():
     interface_b1 = get_interface_mock("s2-eth1", 1, switch_b)
     interface_b2 = get_interface_mock("s2-eth2", 2, switch_b)
 
-    switch_a.interfaces = {interface_a1.id: interface_a1,
-                           interface_a2.id: interface_a2}
-    switch_b.interfaces = {interface_b1.id: interface_b1,
-                           interface_b2.id: interface_b2}
+    switch_a.interfaces = {interface_a1.port_number: interface_a1,
+                           interface_a2.port_number: interface_a2}
+    switch_b.interfaces = {interface_b1.port_number: interface_b1,
+                           interface_b2.port_number: interface_b2}
 
     link_1 = get_link_mock(interface_a1, interface_b1)
 
@@ -28,3 +30,11 @@ def get_topology_mock():
     topology.switches = {switch_a.dpid: switch_a,
                          switch_b.dpid: switch_b}
     return topology
+
+
+def get_lldp_data(dpid, port_number):
+    """Create the LLDP payload of a packet sent by of_lldp."""
+    lldp = LLDP()
+    lldp.chassis_id.sub_value = DPID(dpid)
+    lldp.port_id.sub_value = UBInt32(port_number)
+    return lldp.pack()
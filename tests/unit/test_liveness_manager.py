@@ -1,12 +1,14 @@
 """Test LivenessManager."""
 # pylint: disable=invalid-name,protected-access
+import time
 from datetime import datetime, timedelta
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
 
 from kytos.core.common import EntityStatus
-from napps.kytos.of_lldp.managers.liveness import ILSM, LSM
+from napps.kytos.of_lldp.managers.liveness import (ILSM, LSM, LivenessEntry,
+                                                   LivenessState)
 
 
 class TestILSM:
@@ -16,12 +18,12 @@ class TestILSM:
     @pytest.mark.parametrize(
         "from_state,to",
         [
-            ("init", "up"),
-            ("init", "down"),
-            ("up", "down"),
-            ("up", "init"),
-            ("down", "up"),
-            ("down", "init"),
+            (LivenessState.init, LivenessState.up),
+            (LivenessState.init, LivenessState.down),
+            (LivenessState.up, LivenessState.down),
+            (LivenessState.up, LivenessState.init),
+            (LivenessState.down, LivenessState.up),
+            (LivenessState.down, LivenessState.init),
         ],
     )
     def test_ilsm_transitions(self, from_state, to) -> None:
@@ -33,11 +35,20 @@ class TestILSM:
 
     def test_ilsm_invalid_transition(self) -> None:
         """Test ILSM invalid transition."""
-        ilsm = ILSM(state="down")
-        assert ilsm.state == "down"
-        assert not ilsm.transition_to("down")
-        assert not ilsm.transition_to("invalid_state")
-        assert ilsm.state == "down"
+        ilsm = ILSM(state=LivenessState.down)
+        assert ilsm.state == LivenessState.down
+        assert ilsm.transition_to(LivenessState.down) is None
+        assert ilsm.state == LivenessState.down
+
+    def test_slots(self, ilsm) -> None:
+        """Test ILSM doesn't accept dynamic attributes."""
+        with pytest.raises(AttributeError):
+            ilsm.min_hellos = 1
+
+    def test_reaper_check_no_hello(self, ilsm) -> None:
+        """Test reaper_check without any hello received."""
+        assert ilsm.reaper_check(9, time.monotonic()) is None
+        assert ilsm.state == LivenessState.init
 
     def test_repr(self, ilsm) -> None:
         """Test repr."""
@@ -45,23 +56,41 @@ class TestILSM:
 
     def test_consume_hello(self, ilsm) -> None:
         """Test consume_hello."""
-        assert ilsm.state == "init"
+        assert ilsm.state == LivenessState.init
+        received_ts = time.monotonic() - 5
+        assert ilsm.consume_hello(received_ts) == LivenessState.up
+        assert ilsm.state == LivenessState.up
+        assert ilsm.last_hello_ts == received_ts
         received_at = datetime.utcnow()
-        assert ilsm.consume_hello(received_at) == "up"
-        assert ilsm.state == "up"
-        assert ilsm.last_hello_at == received_at
+        assert abs(ilsm.last_hello_at - received_at) < timedelta(seconds=1)
+
+        received_ts = time.monotonic()
+        assert ilsm.consume_hello(received_ts) is None
+        assert ilsm.state == LivenessState.up
+        assert ilsm.last_hello_ts == received_ts
+
+    def test_last_hello_at_stable(self, ilsm) -> None:
+        """Test last_hello_at doesn't drift between reads."""
+        assert ilsm.last_hello_at is None
+        ilsm.consume_hello(time.monotonic())
+        first = ilsm.last_hello_at
+        with patch("time.monotonic", return_value=time.monotonic() + 60):
+            assert ilsm.last_hello_at == first
+            assert str(ilsm) == f"ILSM(up, {first})"
 
     @pytest.mark.parametrize(
-        "delta_secs, expected_state", [(0, "up"), (9, "up"), (10, "down")]
+        "delta_secs, expected_state",
+        [(0, LivenessState.up), (9, LivenessState.up),
+         (10, LivenessState.down), (86400 + 5, LivenessState.down),
+         (2 * 86400, LivenessState.down)],
     )
     def test_reaper_check(self, ilsm, delta_secs, expected_state) -> None:
         """Test reaper_check."""
-        assert ilsm.state == "init"
+        assert ilsm.state == LivenessState.init
         dead_interval = 9
-        delta = timedelta(seconds=delta_secs)
-        received_at = datetime.utcnow() - delta
-        ilsm.consume_hello(received_at)
-        ilsm.reaper_check(dead_interval)
+        now_ts = time.monotonic()
+        ilsm.consume_hello(now_ts - delta_secs)
+        ilsm.reaper_check(dead_interval, now_ts)
         assert ilsm.state == expected_state
 
 
@@ -76,13 +105,15 @@ class TestLSM:
     @pytest.mark.parametrize(
         "ilsm_a_state,ilsm_b_state,expected",
         [
-            ("init", "dontcare", "init"),
-            ("dontcare", "init", "init"),
-            ("down", "dontcare", "down"),
-            ("dontcare", "down", "down"),
-            ("up", "init", "init"),
-            ("init", "up", "init"),
-            ("up", "up", "up"),
+            (LivenessState.init, LivenessState.init, LivenessState.init),
+            (LivenessState.init, LivenessState.up, LivenessState.init),
+            (LivenessState.init, LivenessState.down, LivenessState.init),
+            (LivenessState.up, LivenessState.init, LivenessState.init),
+            (LivenessState.up, LivenessState.up, LivenessState.up),
+            (LivenessState.up, LivenessState.down, LivenessState.down),
+            (LivenessState.down, LivenessState.init, LivenessState.init),
+            (LivenessState.down, LivenessState.up, LivenessState.down),
+            (LivenessState.down, LivenessState.down, LivenessState.down),
         ],
     )
     def test_agg_state(
@@ -95,12 +126,12 @@ class TestLSM:
     @pytest.mark.parametrize(
         "from_state,to",
         [
-            ("init", "up"),
-            ("init", "down"),
-            ("up", "down"),
-            ("up", "init"),
-            ("down", "up"),
-            ("down", "init"),
+            (LivenessState.init, LivenessState.up),
+            (LivenessState.init, LivenessState.down),
+            (LivenessState.up, LivenessState.down),
+            (LivenessState.up, LivenessState.init),
+            (LivenessState.down, LivenessState.up),
+            (LivenessState.down, LivenessState.init),
         ],
     )
     def test_lsm_transitions(self, from_state, to) -> None:
@@ -111,20 +142,20 @@ class TestLSM:
 
     def test_next_state(self, lsm) -> None:
         """Test next_state."""
-        lsm.ilsm_a.transition_to("up")
-        lsm.ilsm_b.transition_to("up")
-        assert lsm.next_state() == "up"
-        assert lsm.state == "up"
+        lsm.ilsm_a.transition_to(LivenessState.up)
+        lsm.ilsm_b.transition_to(LivenessState.up)
+        assert lsm.next_state() == LivenessState.up
+        assert lsm.state == LivenessState.up
 
-        assert not lsm.next_state()
-        assert lsm.state == "up"
+        assert lsm.next_state() is None
+        assert lsm.state == LivenessState.up
 
-        lsm.ilsm_a.transition_to("down")
-        assert lsm.next_state() == "down"
-        assert lsm.state == "down"
+        lsm.ilsm_a.transition_to(LivenessState.down)
+        assert lsm.next_state() == LivenessState.down
+        assert lsm.state == LivenessState.down
 
-        assert not lsm.next_state()
-        assert lsm.state == "down"
+        assert lsm.next_state() is None
+        assert lsm.state == LivenessState.down
 
 
 class TestLivenessManager:
@@ -138,6 +169,17 @@ class TestLivenessManager:
         liveness_manager.interfaces[intf_one.id] = intf_one
         assert liveness_manager.is_enabled(intf_one)
 
+    def test_is_enabled_pair(
+        self, liveness_manager, intf_one, intf_two
+    ) -> None:
+        """Test _is_enabled_pair."""
+        assert not liveness_manager._is_enabled_pair(intf_one, intf_two)
+        liveness_manager.enable(intf_one)
+        assert not liveness_manager._is_enabled_pair(intf_one, intf_two)
+        assert not liveness_manager._is_enabled_pair(intf_two, intf_one)
+        liveness_manager.enable(intf_two)
+        assert liveness_manager._is_enabled_pair(intf_one, intf_two)
+
     def test_enable(self, liveness_manager, intf_one, intf_two) -> None:
         """Test enable."""
         assert not liveness_manager.interfaces
@@ -153,6 +195,22 @@ class TestLivenessManager:
         liveness_manager.disable(intf_one, intf_two)
         assert intf_one.id not in liveness_manager.interfaces
 
+    async def test_disable_liveness_ids(
+        self, liveness_manager, intf_one, intf_two
+    ) -> None:
+        """Test disable pops the liveness ids of both interfaces."""
+        liveness_manager.atry_to_publish_lsm_event = AsyncMock()
+        liveness_manager.enable(intf_one, intf_two)
+        await liveness_manager.consume_hello(intf_one, intf_two, 1.0)
+        assert liveness_manager.liveness_ids == {
+            intf_one.id: intf_one.id,
+            intf_two.id: intf_one.id,
+        }
+        liveness_manager.disable(intf_two)
+        assert not liveness_manager.liveness
+        assert not liveness_manager.liveness_ids
+        assert not liveness_manager._ilsm_by_id
+
     def test_link_status_hook_liveness(self, liveness_manager) -> None:
         """Test link_status_hook_liveness."""
         mock_link = MagicMock()
@@ -166,6 +224,17 @@ class TestLivenessManager:
         status = liveness_manager.link_status_hook_liveness(mock_link)
         assert status is None
 
+        mock_link.is_active.reset_mock()
+        mock_link.metadata = {}
+        status = liveness_manager.link_status_hook_liveness(mock_link)
+        assert status is None
+        mock_link.is_active.assert_not_called()
+
+        mock_link.metadata = {"liveness_status": "down"}
+        mock_link.is_enabled.return_value = False
+        status = liveness_manager.link_status_hook_liveness(mock_link)
+        assert status is None
+
     def test_try_to_publish_lsm_event(
         self, liveness_manager, intf_one, intf_two
     ) -> None:
@@ -175,11 +244,20 @@ class TestLivenessManager:
             event_suffix, intf_one, intf_two
         )
         assert liveness_manager.controller.buffers.app.put.call_count == 0
-        event_suffix = "up"
+        event_suffix = LivenessState.up
         liveness_manager.try_to_publish_lsm_event(
             event_suffix, intf_one, intf_two
         )
         assert liveness_manager.controller.buffers.app.put.call_count == 1
+        event = liveness_manager.controller.buffers.app.put.call_args[0][0]
+        assert event.name == "kytos/of_lldp.liveness.up"
+        event_suffix = LivenessState.init
+        liveness_manager.try_to_publish_lsm_event(
+            event_suffix, intf_one, intf_two
+        )
+        assert liveness_manager.controller.buffers.app.put.call_count == 2
+        event = liveness_manager.controller.buffers.app.put.call_args[0][0]
+        assert event.name == "kytos/of_lldp.liveness.init"
 
     async def test_atry_to_publish_lsm_event(
         self, liveness_manager, intf_one, intf_two
@@ -191,7 +269,7 @@ class TestLivenessManager:
             event_suffix, intf_one, intf_two
         )
         assert liveness_manager.controller.buffers.app.aput.call_count == 0
-        event_suffix = "up"
+        event_suffix = LivenessState.up
         await liveness_manager.atry_to_publish_lsm_event(
             event_suffix, intf_one, intf_two
         )
@@ -210,11 +288,16 @@ class TestLivenessManager:
             "init",
             None,
         )
-        received_at = datetime.utcnow()
-        await liveness_manager.consume_hello(intf_one, intf_two, received_at)
-        assert liveness_manager.get_interface_status(intf_one.id) == (
-            "up",
-            received_at,
+        received_ts = time.monotonic()
+        await liveness_manager.consume_hello(intf_one, intf_two, received_ts)
+        status, last_hello_at = liveness_manager.get_interface_status(
+            intf_one.id
+        )
+        assert status == "up"
+        assert isinstance(last_hello_at, datetime)
+        assert liveness_manager.get_interface_status(intf_two.id) == (
+            "init",
+            None,
         )
 
     async def test_consume_hello(
@@ -222,25 +305,31 @@ class TestLivenessManager:
     ) -> None:
         """Test consume_hello."""
         assert not liveness_manager.liveness
-        received_at = datetime.utcnow()
+        received_ts = time.monotonic()
         liveness_manager.atry_to_publish_lsm_event = AsyncMock()
 
-        await liveness_manager.consume_hello(intf_one, intf_two, received_at)
+        await liveness_manager.consume_hello(intf_one, intf_two, received_ts)
         assert intf_one.id in liveness_manager.liveness
         assert intf_two.id not in liveness_manager.liveness
         entry = liveness_manager.liveness[intf_one.id]
-        assert entry["interface_a"] == intf_one
-        assert entry["interface_b"] == intf_two
-        assert entry["lsm"].ilsm_a.state == "up"
-        assert entry["lsm"].ilsm_b.state == "init"
-        assert entry["lsm"].state == "init"
+        assert entry.interface_a == intf_one
+        assert entry.interface_b == intf_two
+        assert entry.lsm.ilsm_a.state == LivenessState.up
+        assert entry.lsm.ilsm_b.state == LivenessState.init
+        assert entry.lsm.state == LivenessState.init
         assert liveness_manager.atry_to_publish_lsm_event.call_count == 1
 
-        received_at = datetime.utcnow()
-        await liveness_manager.consume_hello(intf_two, intf_one, received_at)
-        assert entry["lsm"].ilsm_a.state == "up"
-        assert entry["lsm"].ilsm_b.state == "up"
-        assert entry["lsm"].state == "up"
+        received_ts = time.monotonic()
+        await liveness_manager.consume_hello(intf_two, intf_one, received_ts)
+        assert entry.lsm.ilsm_a.state == LivenessState.up
+        assert entry.lsm.ilsm_b.state == LivenessState.up
+        assert entry.lsm.state == LivenessState.up
+        assert liveness_manager.atry_to_publish_lsm_event.call_count == 2
+
+        received_ts = time.monotonic()
+        await liveness_manager.consume_hello(intf_one, intf_two, received_ts)
+        assert entry.lsm.ilsm_a.last_hello_ts == received_ts
+        assert entry.lsm.state == LivenessState.up
         assert liveness_manager.atry_to_publish_lsm_event.call_count == 2
 
     async def test_consume_hello_reinit(
@@ -249,25 +338,33 @@ class TestLivenessManager:
         """Test consume_hello reinitialization, this test a corner
         case where one end of the link has a new interface."""
         assert not liveness_manager.liveness
-        received_at = datetime.utcnow()
+        received_ts = time.monotonic()
         liveness_manager.atry_to_publish_lsm_event = AsyncMock()
 
-        await liveness_manager.consume_hello(intf_one, intf_two, received_at)
-        await liveness_manager.consume_hello(intf_two, intf_one, received_at)
+        await liveness_manager.consume_hello(intf_one, intf_two, received_ts)
+        await liveness_manager.consume_hello(intf_two, intf_one, received_ts)
         assert intf_one.id in liveness_manager.liveness
         entry = liveness_manager.liveness[intf_one.id]
-        assert entry["interface_a"] == intf_one
-        assert entry["interface_b"] == intf_two
-        assert entry["lsm"].ilsm_a.state == "up"
-        assert entry["lsm"].ilsm_b.state == "up"
-        assert entry["lsm"].state == "up"
+        assert entry.interface_a == intf_one
+        assert entry.interface_b == intf_two
+        assert entry.lsm.ilsm_a.state == LivenessState.up
+        assert entry.lsm.ilsm_b.state == LivenessState.up
+        assert entry.lsm.state == LivenessState.up
         assert liveness_manager.atry_to_publish_lsm_event.call_count == 2
 
-        await liveness_manager.consume_hello(intf_one, intf_three, received_at)
+        await liveness_manager.consume_hello(intf_one, intf_three, received_ts)
         entry = liveness_manager.liveness[intf_one.id]
-        assert entry["lsm"].ilsm_a.state == "up"
-        assert entry["lsm"].ilsm_b.state == "init"
-        assert entry["lsm"].state == "init"
+        assert liveness_manager.liveness_ids == {
+            intf_one.id: intf_one.id,
+            intf_three.id: intf_one.id,
+        }
+        assert liveness_manager._ilsm_by_id == {
+            intf_one.id: entry.lsm.ilsm_a,
+            intf_three.id: entry.lsm.ilsm_b,
+        }
+        assert entry.lsm.ilsm_a.state == LivenessState.up
+        assert entry.lsm.ilsm_b.state == LivenessState.init
+        assert entry.lsm.state == LivenessState.init
         assert liveness_manager.atry_to_publish_lsm_event.call_count == 3
 
     def test_should_call_reaper(self, liveness_manager, intf_one) -> None:
@@ -296,34 +393,72 @@ class TestLivenessManager:
         """Test reaper."""
         intf_one.status, intf_two.status = EntityStatus.UP, EntityStatus.UP
         liveness_manager.liveness = {
-            intf_one.id: {
-                "interface_a": intf_one,
-                "interface_b": intf_two,
-                "lsm": lsm,
-            }
+            intf_one.id: LivenessEntry(lsm, intf_one, intf_two)
         }
+        liveness_manager._active_ids = {intf_one.id}
         liveness_manager.should_call_reaper = MagicMock(return_value=True)
-        liveness_manager.try_to_publish_lsm_event = MagicMock()
-        lsm.ilsm_a.reaper_check = MagicMock()
-        lsm.ilsm_b.reaper_check = MagicMock()
+        lsm.ilsm_a.state = lsm.ilsm_b.state = LivenessState.up
 
         dead_interval = 3
-        liveness_manager.reaper(dead_interval)
+        with patch.object(ILSM, "reaper_check") as mock_reaper_check:
+            liveness_manager.reaper(dead_interval)
+
+        now_ts = mock_reaper_check.call_args[0][1]
+        assert mock_reaper_check.call_args_list == [
+            call(dead_interval, now_ts), call(dead_interval, now_ts)
+        ]
+        put_many = liveness_manager.controller.buffers.app.put_many
+        assert put_many.call_count == 1
+        events = put_many.call_args[0][0]
+        assert [event.name for event in events] == [
+            "kytos/of_lldp.liveness.up"
+        ]
+
+        with patch.object(ILSM, "reaper_check"):
+            liveness_manager.reaper(dead_interval)
+        assert put_many.call_count == 1
+
+    async def test_reaper_active_ids(
+        self, liveness_manager, intf_one, intf_two
+    ) -> None:
+        """Test reaper only checks pairs that got hellos and aren't down."""
+        intf_one.status, intf_two.status = EntityStatus.UP, EntityStatus.UP
+        liveness_manager.should_call_reaper = MagicMock(return_value=True)
+        liveness_manager.atry_to_publish_lsm_event = AsyncMock()
+        liveness_manager.reaper(3)
+        liveness_manager.should_call_reaper.assert_not_called()
 
-        lsm.ilsm_a.reaper_check.assert_called_with(dead_interval)
-        lsm.ilsm_b.reaper_check.assert_called_with(dead_interval)
-        assert liveness_manager.try_to_publish_lsm_event.call_count == 1
+        received_ts = time.monotonic() - 10
+        await liveness_manager.consume_hello(intf_one, intf_two, received_ts)
+        await liveness_manager.consume_hello(intf_two, intf_one, received_ts)
+        assert liveness_manager._active_ids == {intf_one.id}
+        entry = liveness_manager.liveness[intf_one.id]
+        assert entry.lsm.state == LivenessState.up
+
+        liveness_manager.reaper(3)
+        assert entry.lsm.state == LivenessState.down
+        assert not liveness_manager._active_ids
+        put_many = liveness_manager.controller.buffers.app.put_many
+        assert put_many.call_count == 1
+
+        liveness_manager.reaper(3)
+        assert liveness_manager.should_call_reaper.call_count == 2
+
+        await liveness_manager.consume_hello(intf_one, intf_two, received_ts)
+        assert liveness_manager._active_ids == {intf_one.id}
+        liveness_manager.disable(intf_one)
+        assert not liveness_manager._active_ids
 
     async def test_consume_hello_if_enabled(self, liveness_manager) -> None:
         """Test test_consume_hello_if_enabled."""
-        liveness_manager.is_enabled = MagicMock(return_value=True)
+        liveness_manager._is_enabled_pair = MagicMock(return_value=True)
         liveness_manager.consume_hello = AsyncMock()
         await liveness_manager.consume_hello_if_enabled(
             MagicMock(), MagicMock()
         )
         assert liveness_manager.consume_hello.call_count == 1
 
-        liveness_manager.is_enabled = MagicMock(return_value=False)
+        liveness_manager._is_enabled_pair = MagicMock(return_value=False)
         await liveness_manager.consume_hello_if_enabled(
             MagicMock(), MagicMock()
         )
@@ -1,5 +1,6 @@
 """Test LoopManager methods."""
-from datetime import timedelta
+import time
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -7,8 +8,29 @@ from httpx import Response
 
 from kytos.lib.helpers import get_interface_mock, get_switch_mock
 
-from kytos.core.helpers import now
-from napps.kytos.of_lldp.managers.loop_manager import LoopManager
+from napps.kytos.of_lldp.managers.loop_manager import (
+    LoopEntry,
+    LoopManager,
+    _iso_now,
+    _to_ignored_pairs,
+)
+
+
+@patch("napps.kytos.of_lldp.managers.loop_manager.time.time")
+def test_iso_now(mock_time) -> None:
+    """Test _iso_now."""
+    mock_time.return_value = 1700000000.2
+    assert _iso_now() == "2023-11-14T22:13:20"
+    mock_time.return_value = 1700000000.9
+    assert _iso_now() == "2023-11-14T22:13:20"
+    mock_time.return_value = 1700000001.1
+    assert _iso_now() == "2023-11-14T22:13:21"
+
+
+def test_to_ignored_pairs() -> None:
+    """Test _to_ignored_pairs."""
+    port_pairs = [[2, 1], [3, 4], [5], "6,7", [1, 2], ["1", 2], [1, None]]
+    assert _to_ignored_pairs(port_pairs) == {(1, 2), (3, 4)}
 
 
 class TestLoopManager:
@@ -32,6 +54,11 @@ class TestLoopManager:
         assert self.loop_manager.publish_loop_actions.call_count == 1
         assert self.loop_manager.apublish_loop_state.call_count == 1
 
+        self.loop_manager.ignored_loops = {dpid: {(1, 2)}}
+        assert not await self.loop_manager.process_if_looped(intf_a, intf_b)
+        assert not await self.loop_manager.process_if_looped(intf_b, intf_a)
+        assert self.loop_manager.publish_loop_actions.call_count == 1
+
     async def test_publish_loop_state(self):
         """Test publish_loop_state."""
         dpid = "00:00:00:00:00:00:00:01"
@@ -52,9 +79,22 @@ class TestLoopManager:
         self.loop_manager.controller.buffers.app.aput = AsyncMock()
         await self.loop_manager.publish_loop_actions(intf_a, intf_b)
         assert self.loop_manager.controller.buffers.app.aput.call_count == len(
-            set(self.loop_manager.actions)
+            self.loop_manager.actions
         )
 
+    def test_actions(self):
+        """Test actions setter."""
+        self.loop_manager.actions = ["log", "disable", "unknown"]
+        assert set(self.loop_manager._supported_actions) == {"log", "disable"}
+        assert self.loop_manager._log_enabled
+        assert self.loop_manager._disable_enabled
+
+        self.loop_manager.actions = ["log", "log"]
+        assert self.loop_manager.actions == {"log"}
+        assert self.loop_manager._supported_actions == ("log",)
+        assert self.loop_manager._log_enabled
+        assert not self.loop_manager._disable_enabled
+
     @pytest.mark.parametrize("dpid_a,port_a,dpid_b,port_b,expected", [
         ("00:00:00:00:00:00:00:01", 6, "00:00:00:00:00:00:00:01", 7, True),
         ("00:00:00:00:00:00:00:01", 1, "00:00:00:00:00:00:00:01", 2, True),
@@ -75,7 +115,7 @@ class TestLoopManager:
         dpid = "00:00:00:00:00:00:00:01"
         port_a = 1
         port_b = 2
-        self.loop_manager.ignored_loops[dpid] = [[port_a, port_b]]
+        self.loop_manager.ignored_loops[dpid] = {(port_a, port_b)}
 
         assert self.loop_manager.is_loop_ignored(
             dpid, port_a=port_a, port_b=port_b
@@ -102,10 +142,10 @@ class TestLoopManager:
 
         await self.loop_manager.handle_log_action(intf_a, intf_b)
         mock_log.warning.call_count = 1
-        assert self.loop_manager.loop_counter[dpid][(1, 2)] == 0
+        assert self.loop_manager.loop_counter[(dpid, (1, 2))] == 0
         await self.loop_manager.handle_log_action(intf_a, intf_b)
         mock_log.warning.call_count = 1
-        assert self.loop_manager.loop_counter[dpid][(1, 2)] == 1
+        assert self.loop_manager.loop_counter[(dpid, (1, 2))] == 1
 
     @patch("napps.kytos.of_lldp.managers.loop_manager.log")
     async def test_handle_disable_action(self, mock_log, monkeypatch):
@@ -116,11 +156,10 @@ class TestLoopManager:
         intf_a = get_interface_mock("s1-eth1", 1, switch)
         intf_b = get_interface_mock("s1-eth2", 2, switch)
 
-        aclient_mock, awith_mock = AsyncMock(), MagicMock()
+        aclient_mock = AsyncMock()
         aclient_mock.post.return_value = Response(200, json={},
                                                   request=MagicMock())
-        awith_mock.return_value.__aenter__.return_value = aclient_mock
-        monkeypatch.setattr("httpx.AsyncClient", awith_mock)
+        monkeypatch.setattr(self.loop_manager, "_http", aclient_mock)
 
         await self.loop_manager.handle_disable_action(intf_a, intf_b)
         assert aclient_mock.post.call_count == 1
@@ -135,13 +174,13 @@ class TestLoopManager:
         intf_a = get_interface_mock("s1-eth1", 1, switch)
         intf_b = get_interface_mock("s1-eth2", 2, switch)
 
-        aclient_mock, awith_mock = AsyncMock(), MagicMock()
+        aclient_mock = AsyncMock()
         aclient_mock.post.return_value = Response(200, json={},
                                                   request=MagicMock())
-        awith_mock.return_value.__aenter__.return_value = aclient_mock
-        monkeypatch.setattr("httpx.AsyncClient", awith_mock)
+        monkeypatch.setattr(self.loop_manager, "_http", aclient_mock)
 
-        self.loop_manager.loop_state[dpid][(1, 2)] = {"state": "detected"}
+        entry = LoopEntry("detected", [1, 2], "", time.time(), "")
+        self.loop_manager.loop_state[(dpid, (1, 2))] = entry
         self.loop_manager.actions = ["log", "disable"]
         await self.loop_manager.handle_loop_stopped(intf_a, intf_b)
         assert intf_a.remove_metadata.call_count == 1
@@ -149,7 +188,17 @@ class TestLoopManager:
         assert "log" in self.loop_manager.actions
         assert "disable" in self.loop_manager.actions
         assert mock_log.info.call_count == 2
-        assert self.loop_manager.loop_state[dpid][(1, 2)]["state"] == "stopped"
+        assert entry.state == "stopped"
+        assert entry.stopped_at == entry.updated_at
+
+    async def test_get_http_shutdown(self):
+        """Test _get_http reuses its client until shutdown."""
+        client = self.loop_manager._get_http()
+        assert self.loop_manager._get_http() is client
+        await self.loop_manager.shutdown()
+        assert client.is_closed
+        assert self.loop_manager._http is None
+        await self.loop_manager.shutdown()
 
     async def test_set_loop_detected(self):
         """Test set_loop_detected."""
@@ -159,55 +208,92 @@ class TestLoopManager:
         intf_a = get_interface_mock("s1-eth1", 1, switch)
         intf_b = get_interface_mock("s1-eth2", 2, switch)
 
-        port_pair = [intf_a.port_number, intf_b.port_number]
+        port_pair = (intf_a.port_number, intf_b.port_number)
         await self.loop_manager.set_loop_detected(intf_a, port_pair)
         assert intf_a.extend_metadata.call_count == 1
 
-        tuple_pair = tuple(port_pair)
-        loop_state = self.loop_manager.loop_state
-        assert loop_state[dpid][tuple_pair]["state"] == "detected"
-        detected_at = loop_state[dpid][tuple_pair]["detected_at"]
+        entry = self.loop_manager.loop_state[(dpid, port_pair)]
+        assert isinstance(entry, LoopEntry)
+        assert entry.state == "detected"
+        assert entry.port_numbers == list(port_pair)
+        detected_at = entry.detected_at
         assert detected_at
-        updated_at = loop_state[dpid][tuple_pair]["updated_at"]
+        updated_at = entry.updated_at
         assert updated_at
 
         # if it's called again updated_at should be udpated
         await self.loop_manager.set_loop_detected(intf_a, port_pair)
         assert intf_a.extend_metadata.call_count == 1
-        assert loop_state[dpid][tuple_pair]["detected_at"] == detected_at
-        assert loop_state[dpid][tuple_pair]["updated_at"] >= updated_at
+        assert entry.detected_at == detected_at
+        assert entry.updated_at >= updated_at
 
         # force a different initial state to ensure it would overwrite
-        self.loop_manager.loop_state[dpid][tuple_pair]["state"] = "stopped"
+        entry.state, entry.stopped_at = "stopped", updated_at
         await self.loop_manager.set_loop_detected(intf_a, port_pair)
         assert intf_a.extend_metadata.call_count == 2
+        assert entry.state == "detected"
+        assert entry.stopped_at is None
+
+    @patch("napps.kytos.of_lldp.managers.loop_manager._iso_now")
+    async def test_set_loop_detected_same_metadata(self, mock_iso_now):
+        """Test set_loop_detected skips unchanged looped metadata."""
+        dt_at = "2023-11-14T22:13:20"
+        mock_iso_now.return_value = dt_at
+        dpid = "00:00:00:00:00:00:00:01"
+        switch = get_switch_mock(dpid, 0x04)
+        intf_a = get_interface_mock("s1-eth1", 1, switch)
+        intf_a.metadata = {
+            "looped": {"port_numbers": [1, 2], "detected_at": dt_at}
+        }
+        await self.loop_manager.set_loop_detected(intf_a, (1, 2))
+        entry = self.loop_manager.loop_state[(dpid, (1, 2))]
+        assert entry.detected_at == dt_at
+        assert not intf_a.extend_metadata.call_count
 
     def test_get_stopped_loops(self):
         """Test get_stopped_loops."""
         dpid = "00:00:00:00:00:00:00:01"
         port_pairs = [(1, 2), (3, 3)]
 
-        delta = now() - timedelta(minutes=1)
-        looped_entry = {
-            "state": "detected",
-            "updated_at": delta.strftime("%Y-%m-%dT%H:%M:%S"),
-        }
+        updated_ts = time.time() - 60
+        looped_entry = LoopEntry("detected", [1, 2], "", updated_ts, "")
         for port_pair in port_pairs:
-            self.loop_manager.loop_state[dpid][port_pair] = looped_entry
+            self.loop_manager.loop_state[(dpid, port_pair)] = looped_entry
         assert self.loop_manager.get_stopped_loops() == {dpid: port_pairs}
 
+    def test_has_loop_stopped(self):
+        """Test has_loop_stopped."""
+        dpid = "00:00:00:00:00:00:00:01"
+        port_pair = (1, 2)
+        entry = LoopEntry("detected", [1, 2], "", time.time(), "")
+        self.loop_manager.loop_state[(dpid, port_pair)] = entry
+        assert not self.loop_manager.has_loop_stopped(dpid, port_pair)
+
+        entry.updated_ts = time.time() - 86400
+        assert self.loop_manager.has_loop_stopped(dpid, port_pair)
+
+        switch = self.loop_manager.controller.get_switch_by_dpid.return_value
+        switch.interfaces = {1: MagicMock()}
+        assert self.loop_manager.has_loop_stopped(dpid, port_pair) is None
+
     async def test_handle_topology_loaded(self):
         """Test handle_topology loaded."""
         dpid = "00:00:00:00:00:00:00:01"
+        dpid_b = "00:00:00:00:00:00:00:02"
         switch = get_switch_mock(dpid, 0x04)
+        switch_b = get_switch_mock(dpid_b, 0x04)
         mock_topo = MagicMock()
         switch.metadata = {"ignored_loops": [[1, 2]]}
-        mock_topo.switches = {dpid: switch}
+        switch_b.metadata = {"ignored_loops": [[3, 4]]}
+        mock_topo.switches = {dpid: switch, dpid_b: switch_b}
 
         self.loop_manager.ignored_loops = {}
         assert dpid not in self.loop_manager.ignored_loops
         await self.loop_manager.handle_topology_loaded(mock_topo)
-        assert self.loop_manager.ignored_loops[dpid] == [[1, 2]]
+        assert self.loop_manager.ignored_loops[dpid] == {(1, 2)}
+        assert self.loop_manager.ignored_loops[dpid_b] == {(3, 4)}
+        locks = self.loop_manager._dpid_locks
+        assert locks[dpid] is not locks[dpid_b]
 
     async def test_handle_switch_metadata_changed_added(self):
         """Test handle_switch_metadata_changed added."""
@@ -218,7 +304,7 @@ class TestLoopManager:
         self.loop_manager.ignored_loops = {}
         assert dpid not in self.loop_manager.ignored_loops
         await self.loop_manager.handle_switch_metadata_changed(switch)
-        assert self.loop_manager.ignored_loops[dpid] == [[1, 2]]
+        assert self.loop_manager.ignored_loops[dpid] == {(1, 2)}
 
     async def test_handle_switch_metadata_changed_incrementally(self):
         """Test handle_switch_metadata_changed incrementally."""
@@ -230,11 +316,34 @@ class TestLoopManager:
 
         assert dpid not in self.loop_manager.ignored_loops
         await self.loop_manager.handle_switch_metadata_changed(switch)
-        assert self.loop_manager.ignored_loops[dpid] == [[1, 2]]
+        assert self.loop_manager.ignored_loops[dpid] == {(1, 2)}
 
         switch.metadata = {"ignored_loops": [[1, 2], [3, 4]]}
         await self.loop_manager.handle_switch_metadata_changed(switch)
-        assert self.loop_manager.ignored_loops[dpid] == [[1, 2], [3, 4]]
+        assert self.loop_manager.ignored_loops[dpid] == {(1, 2), (3, 4)}
+
+    async def test_handle_switch_metadata_changed_malformed(self):
+        """Test handle_switch_metadata_changed with malformed pairs."""
+        dpid = "00:00:00:00:00:00:00:01"
+        switch = get_switch_mock(dpid, 0x04)
+        switch.id = dpid
+        switch.metadata = {"ignored_loops": [[1, 2], ["3", 4], [5, None]]}
+        self.loop_manager.ignored_loops = {}
+
+        await self.loop_manager.handle_switch_metadata_changed(switch)
+        assert self.loop_manager.ignored_loops[dpid] == {(1, 2)}
+
+    def test_init_malformed_ignored_loops(self):
+        """Test LoopManager skips malformed LLDP_IGNORED_LOOPS pairs."""
+        dpid = "00:00:00:00:00:00:00:01"
+        settings = SimpleNamespace(
+            LLDP_IGNORED_LOOPS={dpid: [["1", 2], [4, 3]]},
+            LLDP_LOOP_ACTIONS=["log"],
+            POLLING_TIME=3,
+            LOOP_LOG_EVERY=1,
+        )
+        loop_manager = LoopManager(MagicMock(), settings)
+        assert loop_manager.ignored_loops == {dpid: {(3, 4)}}
 
     async def test_handle_switch_metadata_changed_removed(self):
         """Test handle_switch_metadata_changed removed."""
@@ -242,7 +351,7 @@ class TestLoopManager:
         switch = get_switch_mock(dpid, 0x04)
         switch.id = dpid
         switch.metadata = {"some_key": "some_value"}
-        self.loop_manager.ignored_loops[dpid] = [[1, 2]]
+        self.loop_manager.ignored_loops[dpid] = {(1, 2)}
 
         assert dpid in self.loop_manager.ignored_loops
         await self.loop_manager.handle_switch_metadata_changed(switch)
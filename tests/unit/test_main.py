@@ -1,7 +1,12 @@
 """Test Main methods."""
 import asyncio
+import struct
+import threading
+from functools import cached_property
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, call, patch
 
+import pytest
 from httpx import Response
 from kytos.core.events import KytosEvent
 from kytos.core.exceptions import (KytosTagsNotInTagRanges,
@@ -9,77 +14,34 @@ from kytos.core.exceptions import (KytosTagsNotInTagRanges,
 from kytos.lib.helpers import (get_controller_mock, get_interface_mock,
                                get_kytos_event_mock, get_switch_mock,
                                get_test_client)
+from napps.kytos.of_lldp.constants import LLDP_MULTICAST_MAC
+from napps.kytos.of_lldp.main import Main
+from napps.kytos.of_lldp.managers.liveness import (ILSM, LSM, LivenessEntry,
+                                                   LivenessState)
 from napps.kytos.of_lldp.utils import get_cookie
+from pyof.foundation.network_types import VLAN, Ethernet, EtherType
 from tenacity import RetryError
 
-from tests.helpers import get_topology_mock
+from tests.helpers import get_lldp_data, get_topology_mock
 
-
-@patch('kytos.core.controller.Controller.get_switch_by_dpid')
-@patch('napps.kytos.of_lldp.main.Main._unpack_non_empty')
-@patch('napps.kytos.of_lldp.main.UBInt32')
-@patch('napps.kytos.of_lldp.main.DPID')
-@patch('napps.kytos.of_lldp.main.LLDP')
-@patch('napps.kytos.of_lldp.main.Ethernet')
-async def test_on_ofpt_packet_in(*args):
-    """Test on_ofpt_packet_in."""
-    (mock_ethernet, mock_lldp, mock_dpid, mock_ubint32,
-     mock_unpack_non_empty, mock_get_switch_by_dpid) = args
-
-    # pylint: disable=bad-option-value, import-outside-toplevel
-    from napps.kytos.of_lldp.main import Main
-    Main.get_liveness_controller = MagicMock()
-    topology = get_topology_mock()
-    controller = get_controller_mock()
-    controller.buffers.app.aput = AsyncMock()
-    controller.switches = topology.switches
-    napp = Main(controller)
-    napp.loop_manager.process_if_looped = AsyncMock()
-    napp.liveness_manager.consume_hello_if_enabled = AsyncMock()
-
-    switch = get_switch_mock("00:00:00:00:00:00:00:01", 0x04)
-    message = MagicMock(in_port=1, data='data')
-    event = KytosEvent('ofpt_packet_in', content={'source': switch.connection,
-                       'message': message})
-
-    mocked, ethernet, lldp, dpid, port_b = [MagicMock() for _ in range(5)]
-    mocked.value = 1
-    mock_ubint32.return_value = mocked
-    ethernet.ether_type = 0x88CC
-    ethernet.data = 'eth_data'
-    lldp.chassis_id.sub_value = 'chassis_id'
-    lldp.port_id.sub_value = 'port_id'
-    dpid.value = "00:00:00:00:00:00:00:02"
-    port_b.value = 2
-
-    mock_unpack_non_empty.side_effect = [ethernet, lldp, dpid, port_b]
-    mock_get_switch_by_dpid.return_value = get_switch_mock(dpid.value,
-                                                           0x04)
-    await napp.on_ofpt_packet_in(event)
-
-    calls = [call(mock_ethernet, message.data),
-             call(mock_lldp, ethernet.data),
-             call(mock_dpid, lldp.chassis_id.sub_value),
-             call(mock_ubint32, lldp.port_id.sub_value)]
-    mock_unpack_non_empty.assert_has_calls(calls)
-    assert napp.loop_manager.process_if_looped.call_count == 1
-    assert napp.liveness_manager.consume_hello_if_enabled.call_count == 1
-    assert controller.buffers.app.aput.call_count == 1
+TOPOLOGY_INTERFACE_IDS = ['00:00:00:00:00:00:00:01:1',
+                          '00:00:00:00:00:00:00:01:2',
+                          '00:00:00:00:00:00:00:02:1',
+                          '00:00:00:00:00:00:00:02:2']
 
 
+@pytest.mark.parametrize("intf_found,expected_count", [(True, 1), (False, 0)])
 @patch('kytos.core.controller.Controller.get_switch_by_dpid')
 @patch('napps.kytos.of_lldp.main.Main._unpack_non_empty')
-@patch('napps.kytos.of_lldp.main.UBInt32')
-@patch('napps.kytos.of_lldp.main.DPID')
-@patch('napps.kytos.of_lldp.main.LLDP')
 @patch('napps.kytos.of_lldp.main.Ethernet')
-async def test_on_ofpt_packet_in_early_intf(*args):
-    """Test on_ofpt_packet_in early intf return."""
-    (mock_ethernet, mock_lldp, mock_dpid, mock_ubint32,
-     mock_unpack_non_empty, mock_get_switch_by_dpid) = args
-
-    # pylint: disable=bad-option-value, import-outside-toplevel
-    from napps.kytos.of_lldp.main import Main
+async def test_on_ofpt_packet_in(
+    mock_ethernet,
+    mock_unpack_non_empty,
+    mock_get_switch_by_dpid,
+    intf_found,
+    expected_count,
+):
+    """Test on_ofpt_packet_in, with an early return if intf isn't found."""
     Main.get_liveness_controller = MagicMock()
     topology = get_topology_mock()
     controller = get_controller_mock()
@@ -90,42 +52,37 @@ async def test_on_ofpt_packet_in_early_intf(*args):
     napp.liveness_manager.consume_hello_if_enabled = AsyncMock()
 
     switch = get_switch_mock("00:00:00:00:00:00:00:01", 0x04)
-    message = MagicMock(in_port=1, data='data')
+    message = SimpleNamespace(in_port=1, data='data')
     event = KytosEvent('ofpt_packet_in', content={'source': switch.connection,
                        'message': message})
 
-    mocked, ethernet, lldp, dpid, port_b = [MagicMock() for _ in range(5)]
-    mocked.value = 1
-    mock_ubint32.return_value = mocked
-    ethernet.ether_type = 0x88CC
-    ethernet.data = 'eth_data'
-    lldp.chassis_id.sub_value = 'chassis_id'
-    lldp.port_id.sub_value = 'port_id'
-    dpid.value = "00:00:00:00:00:00:00:02"
-    port_b.value = 2
-
-    mock_unpack_non_empty.side_effect = [ethernet, lldp, dpid, port_b]
-    mock_get_switch_by_dpid.return_value = get_switch_mock(dpid.value,
-                                                           0x04)
-    switch.get_interface_by_port_no = MagicMock(return_value=None)
+    dpid = "00:00:00:00:00:00:00:02"
+    ethernet = SimpleNamespace(
+        ether_type=0x88CC,
+        data=SimpleNamespace(value=get_lldp_data(dpid, 2)),
+    )
+
+    mock_unpack_non_empty.side_effect = [ethernet]
+    mock_get_switch_by_dpid.return_value = get_switch_mock(dpid, 0x04)
+    if not intf_found:
+        switch.get_interface_by_port_no = MagicMock(return_value=None)
     await napp.on_ofpt_packet_in(event)
 
-    calls = [call(mock_ethernet, message.data),
-             call(mock_lldp, ethernet.data),
-             call(mock_dpid, lldp.chassis_id.sub_value),
-             call(mock_ubint32, lldp.port_id.sub_value)]
-    mock_unpack_non_empty.assert_has_calls(calls)
-    switch.get_interface_by_port_no.assert_called()
-    # early return shouldn't allow these to get called
-    assert napp.loop_manager.process_if_looped.call_count == 0
-    assert napp.liveness_manager.consume_hello_if_enabled.call_count == 0
-    assert controller.buffers.app.aput.call_count == 0
+    mock_unpack_non_empty.assert_called_with(mock_ethernet, message.data)
+    mock_get_switch_by_dpid.assert_called_with(dpid)
+    if not intf_found:
+        switch.get_interface_by_port_no.assert_called_with(1)
+    # an early return shouldn't allow these to get called
+    assert napp.loop_manager.process_if_looped.call_count == expected_count
+    liveness_manager = napp.liveness_manager
+    assert liveness_manager.consume_hello_if_enabled.call_count == (
+        expected_count
+    )
+    assert controller.buffers.app.aput.call_count == expected_count
 
 
 async def test_on_table_enabled():
     """Test on_table_enabled"""
-    # pylint: disable=bad-option-value, import-outside-toplevel
-    from napps.kytos.of_lldp.main import Main
     controller = get_controller_mock()
     controller.buffers.app.aput = AsyncMock()
     napp = Main(controller)
@@ -153,8 +110,6 @@ class TestMain:
     def setup_method(self):
         """Execute steps before each tests."""
         # patch('kytos.core.helpers.run_on_thread', lambda x: x).start()
-        # pylint: disable=bad-option-value, import-outside-toplevel
-        from napps.kytos.of_lldp.main import Main
         Main.get_liveness_controller = MagicMock()
         self.topology = get_topology_mock()
         controller = get_controller_mock()
@@ -167,32 +122,27 @@ class TestMain:
         """Teardown."""
         patch.stopall()
 
-    def get_topology_interfaces(self):
+    @cached_property
+    def topology_interfaces(self):
         """Return interfaces present in topology."""
-        interfaces = []
-        for switch in list(self.topology.switches.values()):
-            interfaces += list(switch.interfaces.values())
-        return interfaces
+        return [
+            interface
+            for switch in self.topology.switches.values()
+            for interface in switch.interfaces.values()
+        ]
 
     @patch('napps.kytos.of_lldp.main.of_msg_prio')
     @patch('napps.kytos.of_lldp.main.KytosEvent')
-    @patch('napps.kytos.of_lldp.main.VLAN')
-    @patch('napps.kytos.of_lldp.main.Ethernet')
-    @patch('napps.kytos.of_lldp.main.DPID')
-    @patch('napps.kytos.of_lldp.main.LLDP')
     def test_execute(self, *args):
         """Test execute method."""
-        (_, _, mock_ethernet, _, mock_kytos_event, mock_of_msg_prio) = args
+        (mock_kytos_event, mock_of_msg_prio) = args
         mock_buffer_put = MagicMock()
         self.napp.controller.buffers.msg_out.put = mock_buffer_put
 
-        ethernet = MagicMock()
-        ethernet.pack.return_value = 'pack'
-        interfaces = self.get_topology_interfaces()
+        interfaces = self.topology_interfaces
         po_args = [(interface.switch.connection.protocol.version,
                     interface.port_number, 'pack') for interface in interfaces]
 
-        mock_ethernet.return_value = ethernet
         mock_kytos_event.side_effect = po_args
 
         mock_publish_stopped = MagicMock()
@@ -201,8 +151,63 @@ class TestMain:
 
         mock_of_msg_prio.assert_called()
         mock_buffer_put.assert_has_calls([call(arg)
-                                          for arg in po_args])
+                                          for arg in po_args],
+                                         any_order=True)
         mock_publish_stopped.assert_called()
+        assert self.napp._active_lldp_count == len(interfaces)
+
+    def test_execute_no_lldp_interfaces(self):
+        """Test execute skips switches if no interface has LLDP enabled."""
+        for interface in self.topology_interfaces:
+            interface.lldp = False
+        self.napp.try_to_publish_stopped_loops = MagicMock()
+        self.napp.liveness_manager.reaper = MagicMock()
+        self.napp.execute()
+        assert self.napp._active_lldp_count == 0
+
+        self.napp._emit_switch = MagicMock(return_value=0)
+        self.napp.execute()
+        self.napp._emit_switch.assert_not_called()
+        assert self.napp.try_to_publish_stopped_loops.call_count == 2
+        assert self.napp.liveness_manager.reaper.call_count == 2
+
+        self.napp._invalidate_lldp_count()
+        assert self.napp._active_lldp_count is None
+        self.napp.execute()
+        assert self.napp._emit_switch.call_count == len(
+            self.napp.controller.switches
+        )
+
+    def test_execute_lldp_count_invalidated(self):
+        """Test execute doesn't keep a count invalidated while walking."""
+        def emit_switch(_switch):
+            self.napp._invalidate_lldp_count()
+            return 0
+
+        self.napp._emit_switch = emit_switch
+        self.napp.try_to_publish_stopped_loops = MagicMock()
+        self.napp.execute()
+        assert self.napp._active_lldp_count is None
+
+    def test_execute_lldp_count_invalidated_thread(self):
+        """Test execute with a count invalidated by another thread."""
+        threads = []
+
+        def emit_switch(_switch):
+            thread = threading.Thread(target=self.napp._invalidate_lldp_count)
+            thread.start()
+            threads.append(thread)
+            return 0
+
+        self.napp._emit_switch = emit_switch
+        self.napp.try_to_publish_stopped_loops = MagicMock()
+        self.napp.execute()
+        for thread in threads:
+            thread.join(timeout=1)
+            assert not thread.is_alive()
+        assert threads
+        assert self.napp._active_lldp_count is None
+        assert self.napp._lldp_count_generation == len(threads)
 
     @patch('napps.kytos.of_lldp.main.Main.get_flows_by_switch')
     def test_handle_lldp_flows(self, mock_flows, monkeypatch):
@@ -219,30 +224,35 @@ class TestMain:
         mock_post, mock_del = MagicMock(), MagicMock()
         mock_post.return_value = Response(status_code=202)
         mock_del.return_value = Response(status_code=202)
-        monkeypatch.setattr("httpx.post", mock_post)
-        monkeypatch.setattr("httpx.request", mock_del)
+        monkeypatch.setattr(self.napp._http, "post", mock_post)
+        monkeypatch.setattr(self.napp._http, "request", mock_del)
 
         mock_flows.return_value = {}
         self.napp.use_vlan = MagicMock()
+        self.napp._active_lldp_count = 0
         self.napp._handle_lldp_flows(event_post)
         mock_post.assert_called()
         self.napp.use_vlan.assert_called_with(switch)
+        assert self.napp._active_lldp_count is None
 
         mock_flows.return_value = {"flows": "mocked_flows"}
         self.napp.make_vlan_available = MagicMock()
+        self.napp._per_switch[switch] = {}
         self.napp._handle_lldp_flows(event_del)
         mock_del.assert_called()
         self.napp.make_vlan_available.assert_called_with(switch)
+        assert switch not in self.napp._per_switch
 
     @patch('napps.kytos.of_lldp.main.Main.get_flows_by_switch')
-    @patch("time.sleep")
-    def test_handle_lldp_flows_retries(self, _, mock_flows, monkeypatch):
+    @patch.object(Main.send_flow.retry, "sleep")
+    def test_handle_lldp_flows_retries(self, mock_sleep, mock_flows,
+                                       monkeypatch):
         """Test handle_lldp_flow method retries."""
         dpid = "00:00:00:00:00:00:00:01"
         switch = get_switch_mock("00:00:00:00:00:00:00:01", 0x04)
         mock_flows.return_value = {}
         mock_post = MagicMock()
-        monkeypatch.setattr("httpx.post", mock_post)
+        monkeypatch.setattr(self.napp._http, "post", mock_post)
         self.napp.controller.switches = {dpid: switch}
         event_post = get_kytos_event_mock(name="kytos/topology.switch.enabled",
                                           content={"dpid": dpid})
@@ -254,6 +264,7 @@ class TestMain:
         mock_post.return_value = mock
         self.napp._handle_lldp_flows(event_post)
         assert mock_post.call_count == 3
+        assert mock_sleep.call_count == 2
 
     @patch('napps.kytos.of_lldp.main.log')
     def test_handle_lldp_flows_request_value_error(self, mock_log,
@@ -266,7 +277,7 @@ class TestMain:
         )
         event_post = get_kytos_event_mock(name='kytos/topology.switch.enabled',
                                           content={'dpid': dpid})
-        monkeypatch.setattr("httpx.get", mock_get)
+        monkeypatch.setattr(self.napp._http, "get", mock_get)
         self.napp._handle_lldp_flows(event_post)
         assert mock_log.error.call_count == 1
 
@@ -282,6 +293,41 @@ class TestMain:
         self.napp._handle_lldp_flows(event_post)
         assert mock_log.error.call_count == 1
 
+    @pytest.mark.parametrize("vlan_id", [None, 3799])
+    def test_pack_lldp_frame(self, vlan_id):
+        """Test _pack_lldp_frame packs the same frame as pyof."""
+        self.napp.vlan_id = vlan_id
+        dpid, port_number = "00:00:00:00:00:00:00:01", 2
+        source = "0e:00:00:00:01:02"
+        ethernet = Ethernet(destination=LLDP_MULTICAST_MAC, source=source,
+                            ether_type=EtherType.LLDP,
+                            data=get_lldp_data(dpid, port_number))
+        ethernet.vlans.append(VLAN(vid=vlan_id))
+
+        buffer = bytearray(2048)
+        frame_len = self.napp._pack_lldp_frame(buffer, source, dpid,
+                                               port_number)
+        assert bytes(buffer[:frame_len]) == ethernet.pack()
+
+    def test_get_lldp_frame(self):
+        """Test _get_lldp_frame caches frames per switch."""
+        switch = get_switch_mock("00:00:00:00:00:00:00:01", 0x04)
+        source, scratch = "0e:00:00:00:01:01", bytearray(2048)
+        self.napp._pack_lldp_frame = MagicMock(return_value=4)
+
+        frame = self.napp._get_lldp_frame(switch, 1, source, scratch)
+        assert frame == bytes(4)
+        assert self.napp._get_lldp_frame(switch, 1, source, scratch) is frame
+        assert self.napp._pack_lldp_frame.call_count == 1
+
+        source = "0e:00:00:00:01:02"
+        self.napp._get_lldp_frame(switch, 1, source, scratch)
+        assert self.napp._pack_lldp_frame.call_count == 2
+
+        self.napp._per_switch.pop(switch)
+        self.napp._get_lldp_frame(switch, 1, source, scratch)
+        assert self.napp._pack_lldp_frame.call_count == 3
+
     @patch('napps.kytos.of_lldp.main.PO13')
     @patch('napps.kytos.of_lldp.main.AO13')
     def test_build_lldp_packet_out(self, *args):
@@ -340,6 +386,27 @@ class TestMain:
         assert flow_mod10 is None
         assert flow_mod13 == expected_flow_v0x04
 
+    def test_parse_self_lldp(self):
+        """Test _parse_self_lldp method."""
+        dpid = "00:00:00:00:00:00:00:02"
+        data = get_lldp_data(dpid, 3)
+        assert self.napp._parse_self_lldp(data) == (dpid, 3)
+
+        short_port = data[:11] + b"\x04\x03\x07\x00\x03" + data[18:]
+        assert self.napp._parse_self_lldp(short_port) == (dpid, 3)
+
+    @pytest.mark.parametrize("data", [
+        b"",
+        b"\x02\x09\x07\x00\x00",
+        b"\x02\x09\x05" + bytes(8) + b"\x04\x05\x07" + bytes(4),
+        b"\x02\x09\x07" + bytes(8) + b"\x04\x06\x07" + bytes(5),
+        b"\x02\x09\x07" + bytes(8) + b"\x06\x05\x07" + bytes(4),
+    ])
+    def test_parse_self_lldp_foreign(self, data):
+        """Test _parse_self_lldp with LLDP not generated by of_lldp."""
+        with pytest.raises(struct.error):
+            self.napp._parse_self_lldp(data)
+
     def test_unpack_non_empty(self):
         """Test _unpack_non_empty method."""
         desired_class = MagicMock()
@@ -373,6 +440,13 @@ class TestMain:
         await self.napp.on_topology_loaded(event)
         assert self.napp.loop_manager.handle_topology_loaded.call_count == 1
         assert self.napp.load_liveness.call_count == 1
+        assert self.napp._active_lldp_count is None
+
+    async def test_on_interface_created(self) -> None:
+        """Test on_interface_created."""
+        self.napp._active_lldp_count = 0
+        await self.napp.on_interface_created(MagicMock())
+        assert self.napp._active_lldp_count is None
 
     def test_publish_liveness_status(self) -> None:
         """Test publish_liveness_status."""
@@ -386,43 +460,47 @@ class TestMain:
 
     def test_get_interfaces(self):
         """Test _get_interfaces method."""
-        expected_interfaces = self.get_topology_interfaces()
+        expected_interfaces = self.topology_interfaces
         interfaces = self.napp._get_interfaces()
         assert interfaces == expected_interfaces
 
-    def test_get_interfaces_dict(self):
-        """Test _get_interfaces_dict method."""
-        interfaces = self.napp._get_interfaces()
-        expected_interfaces = {inter.id: inter for inter in interfaces}
-        interfaces_dict = self.napp._get_interfaces_dict(interfaces)
-        assert interfaces_dict == expected_interfaces
+    @pytest.mark.parametrize("interface_id,expected", [
+        ("00:00:00:00:00:00:00:01:1", True),
+        ("00:00:00:00:00:00:00:02:2", True),
+        ("00:00:00:00:00:00:00:01:3", False),
+        ("00:00:00:00:00:00:00:03:1", False),
+        ("00:00:00:00:00:00:00:01:foo", False),
+    ])
+    def test_get_interface_by_id(self, interface_id, expected):
+        """Test _get_interface_by_id method."""
+        interface = self.napp._get_interface_by_id(interface_id)
+        assert (interface is not None) == expected
+        if expected:
+            assert interface.id == interface_id
+
+    def test_has_interfaces(self):
+        """Test _has_interfaces method."""
+        assert self.napp._has_interfaces()
+        for switch in self.napp.controller.switches.values():
+            switch.interfaces = {}
+        assert not self.napp._has_interfaces()
 
     def test_get_lldp_interfaces(self):
         """Test _get_lldp_interfaces method."""
         lldp_interfaces = self.napp._get_lldp_interfaces()
-        expected_interfaces = ['00:00:00:00:00:00:00:01:1',
-                               '00:00:00:00:00:00:00:01:2',
-                               '00:00:00:00:00:00:00:02:1',
-                               '00:00:00:00:00:00:00:02:2']
-        assert lldp_interfaces == expected_interfaces
+        assert lldp_interfaces == TOPOLOGY_INTERFACE_IDS
 
     async def test_rest_get_lldp_interfaces(self):
         """Test get_lldp_interfaces method."""
         endpoint = f"{self.base_endpoint}/interfaces"
         response = await self.api_client.get(endpoint)
-        expected_data = {"interfaces": ['00:00:00:00:00:00:00:01:1',
-                                        '00:00:00:00:00:00:00:01:2',
-                                        '00:00:00:00:00:00:00:02:1',
-                                        '00:00:00:00:00:00:00:02:2']}
+        expected_data = {"interfaces": TOPOLOGY_INTERFACE_IDS}
         assert response.status_code == 200
         assert response.json() == expected_data
 
     async def test_enable_disable_lldp_200(self):
         """Test 200 response for enable_lldp and disable_lldp methods."""
-        data = {"interfaces": ['00:00:00:00:00:00:00:01:1',
-                               '00:00:00:00:00:00:00:01:2',
-                               '00:00:00:00:00:00:00:02:1',
-                               '00:00:00:00:00:00:00:02:2']}
+        data = {"interfaces": TOPOLOGY_INTERFACE_IDS}
         self.napp.controller.loop = asyncio.get_running_loop()
         self.napp.publish_liveness_status = MagicMock()
         endpoint = f"{self.base_endpoint}/interfaces/disable"
@@ -430,9 +508,11 @@ class TestMain:
         assert response.status_code == 200
         assert self.napp.liveness_controller.disable_interfaces.call_count == 1
         assert self.napp.publish_liveness_status.call_count == 1
+        self.napp._active_lldp_count = 0
         endpoint = f"{self.base_endpoint}/interfaces/enable"
         response = await self.api_client.post(endpoint, json=data)
         assert response.status_code == 200
+        assert self.napp._active_lldp_count is None
 
     async def test_enable_disable_lldp_404(self):
         """Test 404 response for enable_lldp and disable_lldp methods."""
@@ -447,10 +527,7 @@ class TestMain:
 
     async def test_enable_disable_lldp_400(self):
         """Test 400 response for enable_lldp and disable_lldp methods."""
-        data = {"interfaces": ['00:00:00:00:00:00:00:01:1',
-                               '00:00:00:00:00:00:00:01:2',
-                               '00:00:00:00:00:00:00:02:1',
-                               '00:00:00:00:00:00:00:02:2',
+        data = {"interfaces": [*TOPOLOGY_INTERFACE_IDS,
                                '00:00:00:00:00:00:00:03:1',
                                '00:00:00:00:00:00:00:03:2',
                                '00:00:00:00:00:00:00:04:1']}
@@ -531,6 +608,23 @@ class TestMain:
         assert response.status_code == 200
         assert response.json() == {"pairs": []}
 
+    async def test_endpoint_get_pair_liveness_entry(self):
+        """Test GET v1/liveness/pair with a liveness entry."""
+        interface_a, interface_b = self.topology_interfaces[:2]
+        lsm = LSM(ILSM(LivenessState.up), ILSM())
+        self.napp.liveness_manager.liveness = {
+            interface_a.id: LivenessEntry(lsm, interface_a, interface_b)
+        }
+        url = f"{self.base_endpoint}/liveness/pair"
+        response = await self.api_client.get(url)
+        assert response.status_code == 200
+        pair = response.json()["pairs"][0]
+        assert pair["interface_a"]["id"] == interface_a.id
+        assert pair["interface_a"]["status"] == "up"
+        assert pair["interface_b"]["id"] == interface_b.id
+        assert pair["interface_b"]["status"] == "init"
+        assert pair["status"] == "init"
+
     def test_set_flow_table_group_owner(self):
         """Test set_flow_table_group_owner"""
         self.napp.table_group = {"base": 2}
@@ -605,7 +699,7 @@ class TestMain:
     def test_send_flow_enabled(self, mock_use, monkeypatch):
         """Test send_flows when switch is enabled"""
         mock_post = MagicMock()
-        monkeypatch.setattr("httpx.post", mock_post)
+        monkeypatch.setattr(self.napp._http, "post", mock_post)
         mock_post.return_value = MagicMock(
             status_code=202, is_server_error=False
         )
@@ -622,7 +716,7 @@ class TestMain:
     def test_send_flow_disabled(self, mock_avaialble, monkeypatch):
         """Test send_flows when switch is disabled"""
         mock_request = MagicMock()
-        monkeypatch.setattr("httpx.request", mock_request)
+        monkeypatch.setattr(self.napp._http, "request", mock_request)
         mock_request.return_value = MagicMock(
             status_code=202, is_server_error=False
         )
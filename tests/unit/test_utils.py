@@ -1,8 +1,9 @@
 """Test utils module."""
-from unittest import TestCase
+from unittest.mock import MagicMock, call
 
 import pytest
-from napps.kytos.of_lldp.utils import get_cookie, int_dpid, try_to_gen_intf_mac
+from napps.kytos.of_lldp.utils import (get_cookie, int_dpid, mac_to_bytes,
+                                       put_many, try_to_gen_intf_mac)
 
 
 @pytest.mark.parametrize(
@@ -57,27 +58,45 @@ def test_try_to_gen_intf_mac(address, dpid, port_number, expected) -> None:
     assert try_to_gen_intf_mac(address, dpid, port_number) == expected
 
 
-class TestUtils(TestCase):
-    """Tests for the utils module."""
+@pytest.mark.parametrize(
+    "address,expected",
+    [
+        ("00:00:00:00:00:00", bytes(6)),
+        ("01:80:c2:00:00:0e", b"\x01\x80\xc2\x00\x00\x0e"),
+        ("0E:00:16:00:02:01", b"\x0e\x00\x16\x00\x02\x01"),
+    ],
+)
+def test_mac_to_bytes(address, expected) -> None:
+    """Test mac_to_bytes."""
+    assert mac_to_bytes(address) == expected
+
+
+def test_put_many() -> None:
+    """Test put_many."""
+    events = [MagicMock(), MagicMock()]
+    buffer = MagicMock()
+    put_many(buffer, events)
+    buffer.put_many.assert_called_once_with(events)
+    buffer.put.assert_not_called()
+
+    buffer = MagicMock(spec=["put"])
+    put_many(buffer, events)
+    buffer.put.assert_has_calls([call(event) for event in events])
+
+
+@pytest.mark.parametrize(
+    "dpid,expected",
+    [
+        ("21:00:10:00:00:00:00:02", 0x2100100000000002),
+        ("00:00:00:00:00:00:00:07", 0x0000000000000007),
+    ],
+)
+def test_int_dpid(dpid, expected) -> None:
+    """Test int dpid."""
+    assert int_dpid(dpid) == expected
 
-    def test_int_dpid(self):
-        """Test int dpid."""
-        test_data = [
-            (
-                "21:00:10:00:00:00:00:02",
-                0x2100100000000002,
-            ),
-            (
-                "00:00:00:00:00:00:00:07",
-                0x0000000000000007,
-            ),
-        ]
-        for dpid, expected_dpid in test_data:
-            with self.subTest(dpid=dpid, expected_dpid=expected_dpid):
-                assert int_dpid(dpid) == expected_dpid
 
-    @staticmethod
-    def test_get_cookie():
-        """Test get_cookie."""
-        dpid = "00:00:00:00:00:00:00:01"
-        assert hex(get_cookie(dpid)) == hex(0xab00000000000001)
+def test_get_cookie() -> None:
+    """Test get_cookie."""
+    dpid = "00:00:00:00:00:00:00:01"
+    assert hex(get_cookie(dpid)) == hex(0xab00000000000001)
@@ -38,6 +38,22 @@ def try_to_gen_intf_mac(address: str, dpid: str, port_number: int) -> str:
     return address
 
 
+@cache
+def mac_to_bytes(address: str) -> bytes:
+    """Convert a MAC address to its 6 bytes representation."""
+    return bytes.fromhex(address.replace(":", ""))
+
+
+def put_many(buffer, events: list) -> None:
+    """Put events on a KytosBuffer, in a single call if it supports it."""
+    buffer_put_many = getattr(buffer, "put_many", None)
+    if buffer_put_many is not None:
+        buffer_put_many(events)
+        return
+    for event in events:
+        buffer.put(event)
+
+
 def _has_mac_multicast_bit_set(address: str) -> bool:
     """Check whether it has the multicast bit set or not."""
     try: